@@ -0,0 +1,136 @@
+"""
+Shared benchmark helpers: timing, peak-memory measurement, JSON history and regression checks.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import psutil
+
+
+def metric(value: float, unit: str, higher_is_better: bool) -> Dict[str, Any]:
+    return {"value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+
+
+def best_time(fn: Callable[[], Any], repeats: int = 3) -> float:
+    """Best wall-clock time of 'repeats' calls, in seconds."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _rss(process: psutil.Process) -> int:
+    """Resident set size of a process and its live child processes (e.g. kernel tile workers)."""
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def time_and_peak_memory(fn: Callable[[], Any], interval: float = 0.005) -> Tuple[Any, float, int]:
+    """
+    Run 'fn' once while sampling resident memory every 'interval' seconds. Returns (result,
+    seconds, peak bytes above the resident memory before the call). RSS covers native
+    allocations (Aer, ripser, BLAS) that tracemalloc cannot see; spikes shorter than the
+    interval can be missed.
+    """
+    process = psutil.Process()
+    baseline = _rss(process)
+    peak = baseline
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(interval):
+            peak = max(peak, _rss(process))
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+    finally:
+        done.set()
+        sampler.join()
+    peak = max(peak, _rss(process))
+    return result, elapsed, peak - baseline
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def new_run(metrics: Dict[str, Dict[str, Any]], config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "numpy": np.__version__, "cpus": os.cpu_count()},
+        "config": config,
+        "metrics": metrics
+    }
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def append_history(path: str, run: Dict[str, Any]):
+    history = load_history(path)
+    history.append(run)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(history, f, indent=2)
+
+
+def find_regressions(run: Dict[str, Any], history: List[Dict[str, Any]],
+                     threshold: float = 0.1, window: int = 5) -> List[Dict[str, Any]]:
+    """
+    Compare each metric with the median of the last 'window' runs that recorded it and
+    flag changes worse than 'threshold' (relative) in the metric's bad direction.
+    """
+    regressions = []
+    for name, current in run["metrics"].items():
+        previous = [r["metrics"][name]["value"] for r in history if name in r.get("metrics", {})][-window:]
+        if not previous:
+            continue
+        baseline = float(np.median(previous))
+        if baseline == 0:
+            continue
+        change = (current["value"] - baseline) / abs(baseline)
+        worse = -change if current["higher_is_better"] else change
+        if worse > threshold:
+            regressions.append({"metric": name, "baseline": baseline, "current": current["value"],
+                                "unit": current["unit"], "change": change})
+    return regressions
+
+
+def print_report(run: Dict[str, Any], regressions: List[Dict[str, Any]]):
+    flagged = {r["metric"] for r in regressions}
+    width = max(len(name) for name in run["metrics"]) if run["metrics"] else 10
+    for name, m in run["metrics"].items():
+        marker = "  <-- REGRESSION" if name in flagged else ""
+        print(f"{name:<{width}}  {m['value']:>14.6g} {m['unit']}{marker}")
+    for r in regressions:
+        print(f"⚠️ {r['metric']}: {r['current']:.6g} vs baseline {r['baseline']:.6g} {r['unit']} ({r['change']:+.1%})")
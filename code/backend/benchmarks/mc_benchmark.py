@@ -0,0 +1,118 @@
+"""
+Monte Carlo and QAE Benchmarks
+
+Measures
+    - paths/sec of simulate_paths across path counts and dtypes
+    - QRNG samples/sec of quantum_random_normal
+    - QAE latency per num_eval_qubits
+    - end-to-end quantum_monte_carlo_endpoint latency and peak resident memory (RSS)
+
+Each run is appended to a JSON history file and compared with the recent history;
+metrics that degrade beyond the threshold are flagged (and fail the run with
+--fail-on-regression).
+
+Usage:
+    python -m benchmarks.mc_benchmark [--quick] [--threshold 0.1] [--fail-on-regression]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from benchmarks.common import (append_history, best_time, find_regressions, load_history,
+                               metric, new_run, print_report, time_and_peak_memory)
+from endpoints.monte_carlo import QuantumMonteCarloSimulator, quantum_monte_carlo_endpoint, quantum_random_normal
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(__file__), "results", "mc_history.json")
+
+FULL_CONFIG = {
+    "path_sizes": [1_000, 10_000, 50_000],
+    "dtypes": ["float64", "float32"],
+    "steps": 252,
+    "qrng_samples": [1_000, 10_000, 100_000],
+    "qae_eval_qubits": [1, 2, 3, 4, 5, 6],
+    "endpoint_input": {"paths": 1000, "steps": 252},
+    "endpoint_max_eval_qubits": 6,
+    "repeats": 3
+}
+
+QUICK_CONFIG = {
+    "path_sizes": [1_000, 10_000],
+    "dtypes": ["float64", "float32"],
+    "steps": 64,
+    "qrng_samples": [1_000, 10_000],
+    "qae_eval_qubits": [1, 2, 3],
+    "endpoint_input": {"paths": 200, "steps": 32},
+    "endpoint_max_eval_qubits": 2,
+    "repeats": 1
+}
+
+
+def bench_simulate_paths(config):
+    metrics = {}
+    for dtype in config["dtypes"]:
+        for size in config["path_sizes"]:
+            simulator = QuantumMonteCarloSimulator(steps=config["steps"], paths=size)
+            seconds = best_time(lambda: simulator.simulate_paths(dtype=np.dtype(dtype)), config["repeats"])
+            metrics[f"simulate_paths.{dtype}.{size}.paths_per_sec"] = metric(size / seconds, "paths/s", True)
+    return metrics
+
+
+def bench_qrng(config):
+    metrics = {}
+    for n in config["qrng_samples"]:
+        seconds = best_time(lambda: quantum_random_normal(n), config["repeats"])
+        metrics[f"quantum_random_normal.{n}.samples_per_sec"] = metric(n / seconds, "samples/s", True)
+    return metrics
+
+
+def bench_qae(config):
+    metrics = {}
+    simulator = QuantumMonteCarloSimulator()
+    for q in config["qae_eval_qubits"]:
+        seconds = best_time(lambda: simulator.run_quantum_amplitude_estimation(num_eval_qubits=q), config["repeats"])
+        metrics[f"qae.eval_qubits_{q}.latency"] = metric(seconds, "s", False)
+    return metrics
+
+
+def bench_endpoint(config):
+    _, seconds, peak = time_and_peak_memory(lambda: quantum_monte_carlo_endpoint(
+        input_data=dict(config["endpoint_input"]),
+        max_eval_qubits=config["endpoint_max_eval_qubits"]
+    ))
+    return {
+        "endpoint.latency": metric(seconds, "s", False),
+        "endpoint.peak_rss": metric(peak / 2**20, "MiB", False)
+    }
+
+
+def run_benchmarks(config):
+    metrics = {}
+    for bench in (bench_simulate_paths, bench_qrng, bench_qae, bench_endpoint):
+        print(f"Running {bench.__name__}...")
+        metrics.update(bench(config))
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo / QAE benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="small sizes for a smoke run")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative regression threshold")
+    parser.add_argument("--window", type=int, default=5, help="number of past runs in the baseline")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the history")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    config = QUICK_CONFIG if args.quick else FULL_CONFIG
+    run = new_run(run_benchmarks(config), {"profile": "quick" if args.quick else "full", **config})
+    # Only compare like with like: quick and full runs use different sizes.
+    history = [r for r in load_history(args.history) if r["config"].get("profile") == run["config"]["profile"]]
+    regressions = find_regressions(run, history, threshold=args.threshold, window=args.window)
+    print_report(run, regressions)
+    if not args.no_save:
+        append_history(args.history, run)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
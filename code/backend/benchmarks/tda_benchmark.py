@@ -0,0 +1,187 @@
+"""
+TDA Scaling Benchmarks
+
+Sweeps the number of points N, the feature dimension and the feature map (type and reps),
+one factor at a time around a base configuration, and records per configuration
+    - quantum kernel evaluation time (statevector simulation + Gram product)
+    - ripser time on the quantum distance matrix (with the endpoint's automatic settings)
+    - end-to-end quantum_tda_endpoint latency and peak resident memory (RSS), with the
+      default reps of each map type
+    - serialized response size for include="diagrams", matrix_format="binary" and, up to
+      --max-dense-points, the dense include="all" response
+
+Every configuration runs with an empty kernel cache and the data registered as an uploaded
+dataset. Configurations that fail (e.g. out of memory) are recorded in the run instead of
+aborting it. Each run is appended to a JSON history and compared with the recent history
+and, if present, with a stored baseline run (written by --save-baseline).
+
+Usage:
+    python -m benchmarks.tda_benchmark [--quick] [--sizes 100,1000,5000] [--save-baseline]
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import (append_history, find_regressions, load_history, metric, new_run,
+                               print_report, time_and_peak_memory)
+from endpoints.datasets import dataset_registry
+from endpoints.kernel_cache import kernel_cache
+from endpoints.quantum_TDA import (auto_persistence_settings, auto_threshold, compute_persistence,
+                                   feature_map_config, feature_map_statevectors, kernel_to_distance,
+                                   quantum_tda_endpoint, statevector_kernel, template_from_config)
+from endpoints.serialization import sanitize_for_json
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEFAULT_HISTORY = os.path.join(RESULTS_DIR, "tda_history.json")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "tda_baseline.json")
+
+FULL_CONFIG = {
+    "sizes": [100, 500, 1000, 2000, 5000],
+    "dims": [2, 4, 8],
+    "feature_maps": [["zz", 1], ["zz", 3], ["zz", 10], ["pauli", 3]],
+    "base": {"size": 500, "dim": 4, "feature_map": ["zz", 10]},
+    "max_dense_points": 1000
+}
+
+QUICK_CONFIG = {
+    "sizes": [100, 300],
+    "dims": [2, 4],
+    "feature_maps": [["zz", 2], ["zz", 10], ["pauli", 3]],
+    "base": {"size": 100, "dim": 4, "feature_map": ["zz", 10]},
+    "max_dense_points": 300
+}
+
+
+def configurations(config):
+    """One-factor-at-a-time sweep around the base configuration."""
+    base = config["base"]
+    seen, configs = set(), []
+    candidates = [(n, base["dim"], tuple(base["feature_map"])) for n in config["sizes"]]
+    candidates += [(base["size"], d, tuple(base["feature_map"])) for d in config["dims"]]
+    candidates += [(base["size"], base["dim"], tuple(m)) for m in config["feature_maps"]]
+    for candidate in candidates:
+        if candidate not in seen:
+            seen.add(candidate)
+            configs.append(candidate)
+    return configs
+
+
+def make_data(n, dim, seed=0):
+    """Three standardized Gaussian clusters."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(scale=3.0, size=(3, dim))
+    data = centres[rng.integers(0, 3, size=n)] + rng.normal(size=(n, dim))
+    return (data - data.mean(axis=0)) / data.std(axis=0)
+
+
+def response_bytes(result) -> int:
+    return len(json.dumps(sanitize_for_json(result)).encode())
+
+
+def bench_configuration(n, dim, feature_map, max_dense_points):
+    map_type, reps = feature_map
+    prefix = f"tda.n{n}.d{dim}.{map_type}{reps}"
+    data = make_data(n, dim)
+    metrics = {}
+
+    # Templates are transpiled once per process and reused by every request; keep that out of the timing.
+    template = template_from_config(dim, {"type": map_type, "reps": reps, "entanglement": "full"})
+    started = time.perf_counter()
+    states = feature_map_statevectors(template, data)
+    distance = kernel_to_distance(statevector_kernel(states))
+    metrics[f"{prefix}.kernel_seconds"] = metric(time.perf_counter() - started, "s", False)
+    del states
+
+    settings = auto_persistence_settings(n)
+    started = time.perf_counter()
+    compute_persistence(distance, thresh=auto_threshold(distance), **settings)
+    metrics[f"{prefix}.ripser_seconds"] = metric(time.perf_counter() - started, "s", False)
+    del distance
+
+    # The endpoint only exposes each map type's default reps.
+    use_pauli = map_type == "pauli"
+    if feature_map_config(use_pauli)["reps"] != reps:
+        return metrics
+    dataset_id = dataset_registry.ingest(io.BytesIO(pd.DataFrame(data).to_csv(index=False).encode()),
+                                         standardize=False)["dataset_id"]
+    result, seconds, peak = time_and_peak_memory(lambda: quantum_tda_endpoint(
+        dataset_id=dataset_id, use_pauli=use_pauli, include="diagrams", max_qubits=max(dim, 1)))
+    metrics[f"{prefix}.endpoint_seconds"] = metric(seconds, "s", False)
+    metrics[f"{prefix}.peak_rss"] = metric(peak / 2**20, "MiB", False)
+    metrics[f"{prefix}.response_bytes.diagrams"] = metric(response_bytes(result), "B", False)
+    # Kernels are cached now, so the remaining responses only add serialization work.
+    metrics[f"{prefix}.response_bytes.binary"] = metric(response_bytes(quantum_tda_endpoint(
+        dataset_id=dataset_id, use_pauli=use_pauli, matrix_format="binary", max_qubits=max(dim, 1))), "B", False)
+    if n <= max_dense_points:
+        metrics[f"{prefix}.response_bytes.dense"] = metric(response_bytes(quantum_tda_endpoint(
+            dataset_id=dataset_id, use_pauli=use_pauli, max_qubits=max(dim, 1))), "B", False)
+    return metrics
+
+
+def run_benchmarks(config):
+    metrics, failures = {}, []
+    for n, dim, feature_map in configurations(config):
+        print(f"Running N={n} dim={dim} map={feature_map[0]} reps={feature_map[1]}...")
+        # Fresh kernel cache and dataset store per configuration, so nothing is served from cache.
+        scratch = tempfile.mkdtemp(prefix="tda-bench-")
+        kernel_cache.cache_dir = os.path.join(scratch, "kernels")
+        dataset_registry.root = os.path.join(scratch, "datasets")
+        try:
+            metrics.update(bench_configuration(n, dim, feature_map, config["max_dense_points"]))
+        except Exception as e:  # includes MemoryError: record where the pipeline falls over
+            failures.append({"size": n, "dim": dim, "feature_map": list(feature_map), "error": repr(e)})
+            print(f"⚠️ failed: {e!r}")
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return metrics, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantum TDA scaling benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="small sizes for a smoke run")
+    parser.add_argument("--sizes", help="comma-separated N values overriding the profile")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="stored baseline run to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative regression threshold")
+    parser.add_argument("--window", type=int, default=5, help="number of past runs in the history baseline")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the history")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    config = dict(QUICK_CONFIG if args.quick else FULL_CONFIG)
+    if args.sizes:
+        config["sizes"] = [int(n) for n in args.sizes.split(",")]
+    metrics, failures = run_benchmarks(config)
+    run = new_run(metrics, {"profile": "quick" if args.quick else "full", **config})
+    run["failures"] = failures
+
+    history = [r for r in load_history(args.history) if r["config"].get("profile") == run["config"]["profile"]]
+    regressions = find_regressions(run, history, threshold=args.threshold, window=args.window)
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        flagged = {r["metric"] for r in regressions}
+        regressions += [r for r in find_regressions(run, [baseline], threshold=args.threshold, window=1)
+                        if r["metric"] not in flagged]
+    print_report(run, regressions)
+    for failure in failures:
+        print(f"⚠️ N={failure['size']} dim={failure['dim']} map={failure['feature_map']}: {failure['error']}")
+
+    if not args.no_save:
+        append_history(args.history, run)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=2)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
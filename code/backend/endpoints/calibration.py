@@ -0,0 +1,190 @@
+"""
+Volatility and Drift Calibration
+
+Calibrates per-pair volatility and drift from stored price history so Monte Carlo requests
+can pass a 'pair' instead of hard-coded 'sigma' and 'r'. Calibrations are cached per
+(pair, window) and refreshed incrementally when new prices are appended, so a request only
+pays for a dictionary lookup.
+
+Price history is read from '<PRICE_HISTORY_DIR>/<BASE>-<QUOTE>.csv' with 'timestamp'
+(unix seconds) and 'price' columns.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+SECONDS_PER_YEAR = 365 * 24 * 3600  # DeFi markets trade around the clock
+DEFAULT_WINDOWS = (30, 90, 365)
+EWMA_LAMBDA = 0.94
+
+# ------------------------------
+# Vectorized estimators
+# ------------------------------
+def rolling_realized_volatility(log_returns: np.ndarray, window: int) -> np.ndarray:
+    """Per-period sample volatility of every trailing window, computed from cumulative sums."""
+    if len(log_returns) < window:
+        return np.empty(0)
+    centred = log_returns - log_returns.mean()
+    s1 = np.concatenate(([0.0], np.cumsum(centred)))
+    s2 = np.concatenate(([0.0], np.cumsum(centred**2)))
+    window_sum = s1[window:] - s1[:-window]
+    window_sq_sum = s2[window:] - s2[:-window]
+    variance = (window_sq_sum - window_sum**2 / window) / max(window - 1, 1)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def ewma_variance(log_returns: np.ndarray, initial_variance: float, lam: float = EWMA_LAMBDA) -> np.ndarray:
+    """RiskMetrics recursion var_t = lam * var_{t-1} + (1 - lam) * r_t^2, run as a linear filter."""
+    if len(log_returns) == 0:
+        return np.empty(0)
+    variance, _ = lfilter([1 - lam], [1, -lam], log_returns**2, zi=[lam * initial_variance])
+    return variance
+
+
+def rolling_drift(log_returns: np.ndarray, window: int) -> np.ndarray:
+    """Per-period mean log-return of every trailing window."""
+    if len(log_returns) < window:
+        return np.empty(0)
+    s1 = np.concatenate(([0.0], np.cumsum(log_returns)))
+    return (s1[window:] - s1[:-window]) / window
+
+# ------------------------------
+# Calibration cache
+# ------------------------------
+def normalize_pair(pair: str) -> str:
+    return pair.upper().replace("/", "-")
+
+
+class CalibrationCache:
+    """Per-pair price history with cached volatility/drift calibrations per window."""
+
+    def __init__(self, history_dir: Optional[str] = None, windows: Sequence[int] = DEFAULT_WINDOWS):
+        self.history_dir = history_dir or os.getenv("PRICE_HISTORY_DIR", "data/prices")
+        self.windows = tuple(windows)
+        self._history = {}  # pair -> {"timestamps", "prices", "log_returns"}
+        self._calibrations = {}  # (pair, window) -> calibration dict
+        self._lock = threading.Lock()
+
+    def _load_history(self, pair: str):
+        path = os.path.join(self.history_dir, f"{pair}.csv")
+        if not os.path.exists(path):
+            raise KeyError(f"No price history for pair '{pair}'")
+        df = pd.read_csv(path, usecols=["timestamp", "price"]).sort_values("timestamp")
+        self._set_history(pair, df["timestamp"].to_numpy(dtype=float), df["price"].to_numpy(dtype=float))
+
+    def _set_history(self, pair: str, timestamps: np.ndarray, prices: np.ndarray):
+        self._history[pair] = {
+            "timestamps": timestamps,
+            "prices": prices,
+            "log_returns": np.diff(np.log(prices))
+        }
+        if len(prices) > 2:
+            for window in self.windows:
+                self._calibrate(pair, window)
+
+    def _periods_per_year(self, pair: str) -> float:
+        timestamps = self._history[pair]["timestamps"]
+        spacing = np.median(np.diff(timestamps)) if len(timestamps) > 1 else 0
+        return SECONDS_PER_YEAR / spacing if spacing > 0 else 252.0
+
+    def _calibrate(self, pair: str, window: int, new_returns: Optional[np.ndarray] = None):
+        """
+        (Re)compute the calibration for one window. With 'new_returns' only the EWMA state is
+        advanced over the new returns; the windowed estimators only look at the last 'window'
+        returns, so the update cost is independent of the history length.
+        """
+        history = self._history[pair]
+        log_returns = history["log_returns"]
+        if len(log_returns) < 2:
+            raise ValueError(f"Not enough price history for pair '{pair}'")
+        tail = log_returns[-window:]
+        previous = self._calibrations.get((pair, window))
+
+        if previous is None or new_returns is None:
+            seed_returns = log_returns[:min(window, len(log_returns))]
+            ewma_var = ewma_variance(log_returns, float(np.var(seed_returns)))[-1]
+        else:
+            ewma_var = ewma_variance(new_returns, previous["_ewma_variance"])[-1]
+
+        annualization = self._periods_per_year(pair)
+        realized = rolling_realized_volatility(tail, len(tail))[-1]
+        drift = rolling_drift(tail, len(tail))[-1]
+        self._calibrations[(pair, window)] = {
+            "pair": pair,
+            "window": int(window),
+            "num_returns": int(len(tail)),
+            "periods_per_year": float(annualization),
+            "realized_volatility": float(realized * np.sqrt(annualization)),
+            "ewma_volatility": float(np.sqrt(ewma_var * annualization)),
+            # Annualised drift of the price (not of the log-price)
+            "drift": float((drift + 0.5 * realized**2) * annualization),
+            "last_timestamp": float(history["timestamps"][-1]),
+            "last_price": float(history["prices"][-1]),
+            "_ewma_variance": float(ewma_var)
+        }
+
+    def get(self, pair: str, window: int = DEFAULT_WINDOWS[0]) -> Dict[str, Any]:
+        """Cached calibration for a pair and window, loading history on first use."""
+        pair = normalize_pair(pair)
+        with self._lock:
+            if pair not in self._history:
+                self._load_history(pair)
+            if (pair, window) not in self._calibrations:
+                self._calibrate(pair, window)
+            calibration = self._calibrations[(pair, window)]
+        return {k: v for k, v in calibration.items() if not k.startswith("_")}
+
+    def prices(self, pair: str) -> np.ndarray:
+        """Price history of a pair in timestamp order, loading it on first use."""
+        pair = normalize_pair(pair)
+        with self._lock:
+            if pair not in self._history:
+                self._load_history(pair)
+            return self._history[pair]["prices"]
+
+    def append_prices(self, pair: str, timestamps: Sequence[float], prices: Sequence[float]) -> Dict[str, Any]:
+        """Append new observations and refresh every cached window for the pair incrementally."""
+        pair = normalize_pair(pair)
+        timestamps = np.asarray(timestamps, dtype=float)
+        prices = np.asarray(prices, dtype=float)
+        order = np.argsort(timestamps)
+        timestamps, prices = timestamps[order], prices[order]
+        with self._lock:
+            if pair not in self._history:
+                try:
+                    self._load_history(pair)
+                except KeyError:
+                    self._set_history(pair, timestamps, prices)
+                    return {"pair": pair, "appended": int(len(prices))}
+            history = self._history[pair]
+            keep = timestamps > history["timestamps"][-1]
+            timestamps, prices = timestamps[keep], prices[keep]
+            if len(prices) == 0:
+                return {"pair": pair, "appended": 0}
+            new_returns = np.diff(np.log(np.concatenate(([history["prices"][-1]], prices))))
+            history["timestamps"] = np.concatenate((history["timestamps"], timestamps))
+            history["prices"] = np.concatenate((history["prices"], prices))
+            history["log_returns"] = np.concatenate((history["log_returns"], new_returns))
+            for cached_pair, window in list(self._calibrations):
+                if cached_pair == pair:
+                    self._calibrate(pair, window, new_returns=new_returns)
+        return {"pair": pair, "appended": int(len(prices))}
+
+    def warm(self):
+        """Calibrate every pair found in the history directory, skipping files that cannot be calibrated."""
+        if not os.path.isdir(self.history_dir):
+            return
+        for name in os.listdir(self.history_dir):
+            if name.endswith(".csv"):
+                try:
+                    self.get(name[:-4])
+                except (KeyError, ValueError) as e:
+                    print(f"⚠️ Skipping price history {name}: {e}")
+
+
+calibration_cache = CalibrationCache()
@@ -0,0 +1,153 @@
+"""
+Dataset Registry
+
+Ingests CSV or Parquet uploads in chunks, keeps the numeric columns (optionally
+standardized) and stores the result as a memory-mapped '.npy' under a content-hash id.
+TDA requests then refer to a dataset by id and every analysis shares one read-only
+mapping instead of re-parsing the file.
+
+Configuration:
+    QTDA_DATASET_DIR  storage directory (default '.cache/datasets')
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DATASET_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _iter_chunks(source, file_format: str, chunksize: int, columns: Optional[List[str]]) -> Iterator[pd.DataFrame]:
+    if file_format == "csv":
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=columns)
+    elif file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet uploads require pyarrow to be installed.")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        raise ValueError("file_format must be either 'csv' or 'parquet'.")
+
+
+class DatasetRegistry:
+    """Content-addressed store of ingested numeric datasets."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("QTDA_DATASET_DIR", ".cache/datasets")
+        self._arrays = {}  # dataset id -> shared read-only memmap
+        self._lock = threading.Lock()
+
+    def _path(self, dataset_id: str, suffix: str) -> str:
+        if not DATASET_ID_PATTERN.match(dataset_id):
+            raise KeyError(f"Invalid dataset id '{dataset_id}'")
+        return os.path.join(self.root, dataset_id + suffix)
+
+    def ingest(self, source, file_format: str = "csv", columns: Optional[List[str]] = None,
+               standardize: bool = True, chunksize: int = 100_000, name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse 'source' (path or file object) chunk by chunk into a registered dataset.
+
+        Pass 1 streams the numeric rows to a scratch file while merging per-chunk column means
+        and squared deviations (Chan et al.) and the content hash; pass 2 standardizes the
+        scratch rows into the final '.npy'. Rows with missing values in the selected columns
+        are dropped.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        scratch_path = os.path.join(self.root, f".{uuid.uuid4().hex}.rows")
+        final_tmp = os.path.join(self.root, f".{uuid.uuid4().hex}.tmp.npy")
+        selected, num_rows, digest = None, 0, None
+        try:
+            with open(scratch_path, "wb") as scratch:
+                for chunk in _iter_chunks(source, file_format, chunksize, columns):
+                    if selected is None:
+                        selected = list(columns) if columns else list(chunk.select_dtypes(include="number").columns)
+                        if not selected:
+                            raise ValueError("No numeric columns found.")
+                        mean = np.zeros(len(selected))
+                        m2 = np.zeros(len(selected))
+                        digest = hashlib.sha256(json.dumps({"columns": selected, "standardize": standardize}).encode())
+                    values = chunk[selected].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+                    values = values[~np.isnan(values).any(axis=1)]
+                    if len(values):
+                        # Pairwise merge of (count, mean, M2); stable where sum/sum-of-squares cancels.
+                        chunk_mean = values.mean(axis=0)
+                        delta = chunk_mean - mean
+                        merged_rows = num_rows + len(values)
+                        mean = mean + delta * len(values) / merged_rows
+                        m2 = m2 + np.square(values - chunk_mean).sum(axis=0) + delta**2 * num_rows * len(values) / merged_rows
+                        num_rows = merged_rows
+                    values = np.ascontiguousarray(values)
+                    digest.update(values.tobytes())
+                    scratch.write(values.tobytes())
+            if num_rows == 0:
+                raise ValueError("No complete numeric rows found.")
+
+            column_mean = mean
+            std = np.sqrt(m2 / num_rows)
+            std[std == 0] = 1.0
+            if not standardize:
+                mean, std = np.zeros_like(mean), np.ones_like(std)
+
+            raw = np.memmap(scratch_path, dtype=np.float64, mode="r", shape=(num_rows, len(selected)))
+            out = np.lib.format.open_memmap(final_tmp, mode="w+", dtype=np.float64, shape=raw.shape)
+            for start in range(0, num_rows, chunksize):
+                out[start:start + chunksize] = (raw[start:start + chunksize] - mean) / std
+            out.flush()
+            del out, raw
+            dataset_id = digest.hexdigest()
+
+            metadata = {
+                "dataset_id": dataset_id,
+                "name": name,
+                "columns": selected,
+                "shape": [num_rows, len(selected)],
+                "standardized": standardize,
+                "mean": column_mean.tolist(),
+                "std": std.tolist() if standardize else None,
+                "created": datetime.now(timezone.utc).isoformat()
+            }
+            with self._lock:
+                if os.path.exists(self._path(dataset_id, ".npy")):
+                    os.remove(final_tmp)
+                    return {**self.metadata(dataset_id), "deduplicated": True}
+                os.replace(final_tmp, self._path(dataset_id, ".npy"))
+                with open(self._path(dataset_id, ".json"), "w") as f:
+                    json.dump(metadata, f, indent=2)
+            return {**metadata, "deduplicated": False}
+        finally:
+            for path in (scratch_path, final_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def load(self, dataset_id: str) -> np.ndarray:
+        """Shared read-only memory map of a registered dataset."""
+        with self._lock:
+            if dataset_id not in self._arrays:
+                path = self._path(dataset_id, ".npy")
+                if not os.path.exists(path):
+                    raise KeyError(f"Unknown dataset id '{dataset_id}'")
+                self._arrays[dataset_id] = np.load(path, mmap_mode="r")
+            return self._arrays[dataset_id]
+
+    def metadata(self, dataset_id: str) -> Dict[str, Any]:
+        with open(self._path(dataset_id, ".json")) as f:
+            return json.load(f)
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.root):
+            return []
+        return [self.metadata(name[:-5]) for name in sorted(os.listdir(self.root))
+                if name.endswith(".json") and DATASET_ID_PATTERN.match(name[:-5])]
+
+
+dataset_registry = DatasetRegistry()
@@ -0,0 +1,175 @@
+"""
+Persistence Diagram Distances
+
+Distances between persistence diagrams of one homology dimension:
+    - bottleneck: binary search over the candidate costs for the smallest value that
+      admits a perfect matching (scipy maximum_bipartite_matching)
+    - wasserstein: optimal matching with scipy linear_sum_assignment, O(N^3)
+    - sliced_wasserstein: average 1-D Wasserstein distance over projection directions,
+      O(M N log N) for M directions, for large diagrams
+
+Points may be matched to the diagonal; the ground metric is L-infinity. Infinite
+(essential) features are left out and their counts reported separately.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_bipartite_matching
+
+DIAGRAM_METRICS = ("bottleneck", "wasserstein", "sliced_wasserstein")
+EXACT_MAX_POINTS = 1000  # above this, "auto" falls back to the sliced approximation
+
+
+def finite_diagram(diagram) -> np.ndarray:
+    diagram = np.asarray(diagram, dtype=float).reshape(-1, 2)
+    return diagram[np.isfinite(diagram).all(axis=1)]
+
+
+def _augmented_costs(d1: np.ndarray, d2: np.ndarray) -> np.ndarray:
+    """
+    (n + m) x (m + n) L-infinity cost matrix of the matching problem with diagonal copies:
+    point-point in the top left, point-diagonal on the two off blocks, diagonal-diagonal 0.
+    """
+    n, m = len(d1), len(d2)
+    costs = np.zeros((n + m, m + n))
+    costs[:n, :m] = np.abs(d1[:, None, :] - d2[None, :, :]).max(axis=2)
+    diag1 = (d1[:, 1] - d1[:, 0]) / 2
+    diag2 = (d2[:, 1] - d2[:, 0]) / 2
+    costs[:n, m:] = np.inf
+    costs[:n, m:][np.arange(n), np.arange(n)] = diag1
+    costs[n:, :m] = np.inf
+    costs[n:, :m][np.arange(m), np.arange(m)] = diag2
+    return costs
+
+
+def wasserstein_distance(diagram1, diagram2, p: float = 2.0) -> float:
+    """p-Wasserstein distance from the optimal assignment of the augmented cost matrix."""
+    d1, d2 = finite_diagram(diagram1), finite_diagram(diagram2)
+    if len(d1) + len(d2) == 0:
+        return 0.0
+    costs = _augmented_costs(d1, d2)
+    # linear_sum_assignment needs finite costs; forbidden pairs get a cost above any feasible matching.
+    finite = np.isfinite(costs)
+    powered = np.where(finite, costs, 0.0) ** p
+    powered[~finite] = powered.sum() + 1.0
+    rows, cols = linear_sum_assignment(powered)
+    return float(powered[rows, cols].sum() ** (1.0 / p))
+
+
+def bottleneck_distance(diagram1, diagram2) -> float:
+    """Smallest t for which the edges of cost <= t contain a perfect matching."""
+    d1, d2 = finite_diagram(diagram1), finite_diagram(diagram2)
+    if len(d1) + len(d2) == 0:
+        return 0.0
+    costs = _augmented_costs(d1, d2)
+    candidates = np.unique(costs[np.isfinite(costs)])
+    size = costs.shape[0]
+
+    def has_perfect_matching(t: float) -> bool:
+        graph = csr_matrix(costs <= t)
+        return bool((maximum_bipartite_matching(graph, perm_type="column") >= 0).all()) if graph.nnz >= size else False
+
+    low, high = 0, len(candidates) - 1  # matching every point to the diagonal is always feasible
+    while low < high:
+        mid = (low + high) // 2
+        if has_perfect_matching(candidates[mid]):
+            high = mid
+        else:
+            low = mid + 1
+    return float(candidates[low])
+
+
+def sliced_wasserstein_distance(diagram1, diagram2, num_directions: int = 50) -> float:
+    """
+    Sliced Wasserstein distance: each diagram is completed with the diagonal projections of
+    the other, both are projected onto 'num_directions' lines through the origin, and the
+    sorted projections are compared. All directions are handled in one sort.
+    """
+    d1, d2 = finite_diagram(diagram1), finite_diagram(diagram2)
+    if len(d1) + len(d2) == 0:
+        return 0.0
+    on_diagonal = lambda d: np.repeat(((d[:, 0] + d[:, 1]) / 2)[:, None], 2, axis=1)
+    a = np.vstack((d1, on_diagonal(d2)))
+    b = np.vstack((d2, on_diagonal(d1)))
+    angles = np.linspace(-np.pi / 2, np.pi / 2, num_directions, endpoint=False)
+    directions = np.stack((np.cos(angles), np.sin(angles)))
+    projected_a = np.sort(a @ directions, axis=0)
+    projected_b = np.sort(b @ directions, axis=0)
+    return float(np.abs(projected_a - projected_b).sum(axis=0).mean())
+
+
+def diagram_distance(diagram1, diagram2, metric: str = "wasserstein", **kwargs) -> float:
+    if metric == "bottleneck":
+        return bottleneck_distance(diagram1, diagram2)
+    if metric == "wasserstein":
+        return wasserstein_distance(diagram1, diagram2, **kwargs)
+    if metric == "sliced_wasserstein":
+        return sliced_wasserstein_distance(diagram1, diagram2, **kwargs)
+    raise ValueError(f"metric must be one of {DIAGRAM_METRICS}.")
+
+
+def check_metrics(metrics):
+    """Raise ValueError unless 'metrics' is "auto", a metric name or a list of metric names."""
+    if metrics == "auto":
+        return
+    chosen = [metrics] if isinstance(metrics, str) else list(metrics) if isinstance(metrics, (list, tuple)) else [metrics]
+    invalid = [metric for metric in chosen if metric not in DIAGRAM_METRICS]
+    if invalid or not chosen:
+        raise ValueError(f"diagram metrics must be \"auto\" or from {DIAGRAM_METRICS}; got {invalid or chosen}.")
+
+
+def compare_diagram_sets(diagrams1: Sequence, diagrams2: Sequence, metrics="auto") -> List[Dict[str, Any]]:
+    """
+    Per-dimension distances between two sets of diagrams (e.g. quantum vs classical).
+    metrics="auto" gives exact bottleneck and Wasserstein up to EXACT_MAX_POINTS finite
+    points per diagram, and the sliced approximation beyond.
+    """
+    comparisons = []
+    for dim, (dgm1, dgm2) in enumerate(zip(diagrams1, diagrams2)):
+        d1, d2 = finite_diagram(dgm1), finite_diagram(dgm2)
+        if metrics == "auto":
+            chosen = ["sliced_wasserstein"] if max(len(d1), len(d2)) > EXACT_MAX_POINTS else ["bottleneck", "wasserstein"]
+        else:
+            chosen = [metrics] if isinstance(metrics, str) else list(metrics)
+        entry = {
+            "dimension": dim,
+            "num_points": [int(len(d1)), int(len(d2))],
+            "essential": [int(len(dgm1) - len(d1)), int(len(dgm2) - len(d2))]
+        }
+        for metric in chosen:
+            entry[metric] = diagram_distance(d1, d2, metric)
+        comparisons.append(entry)
+    return comparisons
+
+
+def pairwise_diagram_distances(diagrams: Sequence, metric: str = "sliced_wasserstein") -> np.ndarray:
+    """Symmetric distance matrix between many single-dimension diagrams."""
+    diagrams = [finite_diagram(dgm) for dgm in diagrams]
+    n = len(diagrams)
+    distances = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i + 1, n):
+            distances[i, j] = distances[j, i] = diagram_distance(diagrams[i], diagrams[j], metric)
+    return distances
+
+# ------------------------------
+# API Endpoint Function
+# ------------------------------
+def diagram_distances_endpoint(diagrams, metric="sliced_wasserstein") -> Dict[str, Any]:
+    """
+    Batch comparison of persistence diagrams.
+
+    Parameters:
+    - diagrams: list of diagrams, each a list of [birth, death] pairs of one homology dimension
+    - metric: "bottleneck", "wasserstein" or "sliced_wasserstein"
+
+    Returns the pairwise distance matrix.
+    """
+    if not diagrams or len(diagrams) < 2:
+        return {"error": "At least two diagrams are needed."}
+    if metric not in DIAGRAM_METRICS:
+        return {"error": f"metric must be one of {DIAGRAM_METRICS}."}
+    return {"metric": metric, "num_diagrams": len(diagrams), "distances": pairwise_diagram_distances(diagrams, metric)}
@@ -0,0 +1,87 @@
+"""
+Feature Reduction for Quantum Encoding
+
+The feature maps use one qubit per feature, and statevector simulation cost doubles with
+every qubit. Inputs wider than the qubit budget are reduced before encoding, either by
+PCA (randomized SVD of the centred data) or by keeping the highest-variance columns,
+and the retained variance is reported. With reduction disabled, oversized inputs are
+refused instead. A requested budget can lower the server's budget but never raise it.
+
+Configuration:
+    QTDA_MAX_QUBITS  qubit budget, and the upper bound on requested budgets (default 12)
+"""
+
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sklearn.utils.extmath import randomized_svd
+
+REDUCTION_METHODS = ("pca", "variance", "none")
+DEFAULT_MAX_QUBITS = int(os.getenv("QTDA_MAX_QUBITS", 12))
+
+
+def qubit_budget(max_qubits: Optional[int] = None) -> int:
+    """The requested qubit budget, clamped to QTDA_MAX_QUBITS (the default when None)."""
+    if max_qubits is None:
+        return DEFAULT_MAX_QUBITS
+    if int(max_qubits) < 1:
+        raise ValueError("max_qubits must be at least 1.")
+    return min(int(max_qubits), DEFAULT_MAX_QUBITS)
+
+
+def check_qubit_budget(num_features: int, max_qubits: Optional[int] = None):
+    """Raise ValueError if encoding 'num_features' features would exceed the qubit budget."""
+    max_qubits = qubit_budget(max_qubits)
+    if num_features > max_qubits:
+        raise ValueError(f"{num_features} features need {num_features} qubits, above the budget of {max_qubits}; "
+                         "reduce the input or enable feature reduction.")
+
+
+def pca_reduce(data: np.ndarray, n_components: int, seed: int = 0) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Project onto the top principal components, computed by randomized SVD."""
+    centred = np.asarray(data, dtype=float) - np.mean(data, axis=0)
+    U, S, _ = randomized_svd(centred, n_components=n_components, random_state=seed)
+    total_variance = float(np.square(centred).sum())
+    ratios = np.square(S) / total_variance if total_variance > 0 else np.zeros_like(S)
+    return U * S, {
+        "explained_variance_ratio": ratios.tolist(),
+        "total_explained_variance": float(ratios.sum())
+    }
+
+
+def variance_select(data: np.ndarray, n_features: int) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Keep the 'n_features' columns with the largest variance, in their original order."""
+    variances = np.var(data, axis=0)
+    selected = np.sort(np.argsort(variances)[::-1][:n_features])
+    total_variance = float(variances.sum())
+    return np.asarray(data)[:, selected], {
+        "selected_features": selected.tolist(),
+        "total_explained_variance": float(variances[selected].sum() / total_variance) if total_variance > 0 else 0.0
+    }
+
+
+def reduce_to_qubit_budget(data: np.ndarray, max_qubits: Optional[int] = None, method: str = "pca",
+                           seed: int = 0) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Reduce 'data' to at most 'max_qubits' features for quantum encoding.
+    Inputs within the budget are returned unchanged; method="none" refuses larger ones.
+    'max_qubits' is clamped to QTDA_MAX_QUBITS. Returns (data, report).
+    """
+    max_qubits = qubit_budget(max_qubits)
+    method = method or "none"
+    if method not in REDUCTION_METHODS:
+        raise ValueError(f"reduction must be one of {REDUCTION_METHODS}.")
+    num_features = data.shape[1]
+    report = {"method": "none", "max_qubits": max_qubits, "input_features": int(num_features),
+              "output_features": int(num_features)}
+    if num_features <= max_qubits:
+        return data, report
+    if method == "none":
+        check_qubit_budget(num_features, max_qubits)
+    if method == "pca":
+        reduced, details = pca_reduce(data, max_qubits, seed=seed)
+    else:
+        reduced, details = variance_select(data, max_qubits)
+    report.update(method=method, output_features=int(reduced.shape[1]), **details)
+    return reduced, report
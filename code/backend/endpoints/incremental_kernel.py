@@ -0,0 +1,218 @@
+"""
+Incremental Kernel Updates
+
+Keeps the quantum and RBF kernel/distance matrices of a growing (or sliding) window of
+observations per dataset id. Appending k rows to a window of N computes only the new
+k x N block and the k x k corner, plus k statevector simulations, instead of the full
+(N + k)^2 kernel.
+
+Matrices live in preallocated buffers. In growing mode the capacity doubles when full;
+in sliding-window mode ('max_rows') the buffer is a ring and new rows overwrite the
+slots of the oldest ones, so nothing is copied on update.
+
+The store is bounded: windows are limited to QTDA_INCREMENTAL_MAX_ROWS rows, and
+beyond QTDA_INCREMENTAL_MAX_DATASETS dataset ids the least recently updated one is
+dropped.
+
+Configuration:
+    QTDA_INCREMENTAL_MAX_ROWS      largest window per dataset id (default 2048)
+    QTDA_INCREMENTAL_MAX_DATASETS  dataset ids kept in memory (default 8)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sklearn.metrics.pairwise import rbf_kernel
+
+from endpoints.feature_reduction import check_qubit_budget
+from endpoints.quantum_TDA import (compute_persistence, feature_map_config, feature_map_statevectors,
+                                   feature_map_template, statevector_kernel)
+
+MAX_WINDOW_ROWS = int(os.getenv("QTDA_INCREMENTAL_MAX_ROWS", 2048))
+MAX_DATASETS = int(os.getenv("QTDA_INCREMENTAL_MAX_DATASETS", 8))
+
+
+class _IncrementalDataset:
+    def __init__(self, num_features: int, use_pauli: bool, gamma: float, max_rows: Optional[int],
+                 row_limit: int = MAX_WINDOW_ROWS):
+        self.use_pauli = use_pauli
+        self.gamma = gamma
+        self.max_rows = max_rows
+        self.row_limit = row_limit
+        self.template = feature_map_template(num_features, use_pauli=use_pauli)
+        self.capacity = 0
+        self.data = np.empty((0, num_features))
+        self.states = np.empty((0, 2 ** num_features), dtype=complex)
+        self.q_kernel = np.empty((0, 0))
+        self.c_kernel = np.empty((0, 0))
+        self.q_dist = np.empty((0, 0))
+        self.c_dist = np.empty((0, 0))
+        self.slots = np.empty(0, dtype=int)  # buffer slots of the live rows, oldest first
+        self.total_appended = 0
+
+    def _grow(self, capacity: int):
+        def grown(matrix, shape):
+            out = np.zeros(shape, dtype=matrix.dtype)
+            out[tuple(slice(0, s) for s in matrix.shape)] = matrix
+            return out
+        self.data = grown(self.data, (capacity, self.data.shape[1]))
+        self.states = grown(self.states, (capacity, self.states.shape[1]))
+        for name in ("q_kernel", "c_kernel", "q_dist", "c_dist"):
+            setattr(self, name, grown(getattr(self, name), (capacity, capacity)))
+        self.capacity = capacity
+
+    def _assign_slots(self, k: int) -> np.ndarray:
+        n = len(self.slots)
+        if self.max_rows is None:
+            if n + k > self.row_limit:
+                raise ValueError(f"The window would exceed {self.row_limit} rows; "
+                                 "use max_rows for a sliding window or reset it.")
+            if n + k > self.capacity:
+                self._grow(min(max(2 * self.capacity, n + k, 16), self.row_limit))
+            new_slots = np.arange(n, n + k)
+            self.slots = np.concatenate((self.slots, new_slots))
+            return new_slots
+        if self.capacity < self.max_rows:
+            self._grow(self.max_rows)
+        free = np.setdiff1d(np.arange(self.capacity), self.slots)[:k]
+        evicted = self.slots[:k - len(free)]
+        new_slots = np.concatenate((free, evicted)).astype(int)
+        self.slots = np.concatenate((self.slots[len(evicted):], new_slots))
+        return new_slots
+
+    def append(self, rows: np.ndarray):
+        if self.max_rows is not None and len(rows) > self.max_rows:
+            rows = rows[-self.max_rows:]
+        k = len(rows)
+        new_slots = self._assign_slots(k)
+        live = self.slots
+
+        self.data[new_slots] = rows
+        self.states[new_slots] = feature_map_statevectors(self.template, rows)
+
+        # New k x N block (which includes the k x k corner), mirrored by symmetry.
+        q_block = statevector_kernel(self.states[new_slots], self.states[live])
+        c_block = rbf_kernel(rows, self.data[live], gamma=self.gamma)
+        for kernel, dist, block in ((self.q_kernel, self.q_dist, q_block), (self.c_kernel, self.c_dist, c_block)):
+            kernel[np.ix_(new_slots, live)] = block
+            kernel[np.ix_(live, new_slots)] = block.T
+            diag = kernel[live, live]
+            new_diag = kernel[new_slots, new_slots]
+            dist_block = np.sqrt(np.abs(new_diag[:, None] + diag[None, :] - 2 * block))
+            dist[np.ix_(new_slots, live)] = dist_block
+            dist[np.ix_(live, new_slots)] = dist_block.T
+        self.total_appended += k
+
+    def matrices(self, include_kernels: bool = False) -> Dict[str, np.ndarray]:
+        """Copies of the live distance matrices (and optionally data and kernels) in chronological row order."""
+        order = np.ix_(self.slots, self.slots)
+        matrices = {
+            "quantum_distance_matrix": self.q_dist[order],
+            "classical_distance_matrix": self.c_dist[order]
+        }
+        if include_kernels:
+            matrices.update({
+                "input_data": self.data[self.slots],
+                "quantum_kernel_matrix": self.q_kernel[order],
+                "classical_kernel_matrix": self.c_kernel[order]
+            })
+        return matrices
+
+
+class IncrementalKernelStore:
+    """In-memory incremental kernel state per dataset id, bounded in window rows and dataset ids (LRU)."""
+
+    def __init__(self, max_rows: int = MAX_WINDOW_ROWS, max_datasets: int = MAX_DATASETS):
+        self.max_rows = max_rows
+        self.max_datasets = max_datasets
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def append(self, dataset_id: str, rows, use_pauli: bool = False, gamma: float = 0.001,
+               max_rows: Optional[int] = None, include_matrices: bool = False) -> Dict[str, Any]:
+        """
+        Append rows to a dataset's window and return a snapshot of it taken under the lock
+        ("window_size", "total_appended", "matrices"), so concurrent appends cannot change
+        the matrices while the caller computes persistence. The snapshot holds only the two
+        distance matrices unless include_matrices is set.
+        """
+        rows = np.asarray(rows, dtype=float)
+        if rows.size == 0:
+            rows = rows.reshape(0, rows.shape[-1] if rows.ndim == 2 else 0)
+        rows = np.atleast_2d(rows)
+        if max_rows is not None and not 0 < max_rows <= self.max_rows:
+            raise ValueError(f"max_rows must be between 1 and {self.max_rows}.")
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            if dataset is None:
+                if len(rows) == 0 or rows.shape[1] == 0:
+                    raise ValueError(f"Dataset '{dataset_id}' does not exist yet; "
+                                     "provide at least one row with one or more features.")
+                check_qubit_budget(rows.shape[1])
+                dataset = _IncrementalDataset(rows.shape[1], use_pauli, gamma, max_rows, row_limit=self.max_rows)
+            elif (dataset.use_pauli, dataset.gamma, dataset.max_rows) != (use_pauli, gamma, max_rows) \
+                    or (len(rows) and dataset.data.shape[1] != rows.shape[1]):
+                raise ValueError(f"Dataset '{dataset_id}' was created with a different configuration; reset it first.")
+            if len(rows):
+                dataset.append(rows)
+            self._datasets[dataset_id] = dataset
+            self._datasets.move_to_end(dataset_id)
+            while len(self._datasets) > self.max_datasets:
+                self._datasets.popitem(last=False)
+            return {
+                "window_size": int(len(dataset.slots)),
+                "total_appended": int(dataset.total_appended),
+                "matrices": dataset.matrices(include_kernels=include_matrices)
+            }
+
+    def reset(self, dataset_id: str):
+        with self._lock:
+            self._datasets.pop(dataset_id, None)
+
+
+incremental_store = IncrementalKernelStore()
+
+# ------------------------------
+# API Endpoint Function
+# ------------------------------
+def incremental_tda_endpoint(dataset_id, rows, use_pauli=False, gamma=0.001, max_rows=None,
+                             reset=False, include_matrices=False) -> Dict[str, Any]:
+    """
+    Append observations to a dataset's window and return persistence diagrams of the
+    updated quantum and RBF kernel distances.
+
+    Parameters:
+    - dataset_id: key of the incremental window
+    - rows: list of new observations (each a list of features)
+    - max_rows: sliding-window length; the oldest rows are dropped beyond it (None = grow,
+      up to QTDA_INCREMENTAL_MAX_ROWS rows)
+    - reset: discard the stored window before appending
+    - include_matrices: also return the kernel and distance matrices
+    """
+    if dataset_id is None:
+        return {"error": "dataset_id not provided"}
+    if reset:
+        incremental_store.reset(dataset_id)
+    try:
+        snapshot = incremental_store.append(dataset_id, rows if rows is not None else [], use_pauli=use_pauli,
+                                            gamma=gamma, max_rows=max_rows, include_matrices=include_matrices)
+    except ValueError as e:
+        return {"error": str(e)}
+    if snapshot["window_size"] < 2:
+        return {"error": "At least two observations are needed for persistence."}
+
+    matrices = snapshot["matrices"]
+    output = {
+        "dataset_id": dataset_id,
+        "window_size": snapshot["window_size"],
+        "total_appended": snapshot["total_appended"],
+        "feature_map": feature_map_config(use_pauli),
+        "quantum_persistence_diagrams": [dgm.tolist() for dgm in compute_persistence(matrices["quantum_distance_matrix"])],
+        "classical_persistence_diagrams": [dgm.tolist() for dgm in compute_persistence(matrices["classical_distance_matrix"])]
+    }
+    if include_matrices:
+        output.update({name: matrix.tolist() for name, matrix in matrices.items()})
+    return output
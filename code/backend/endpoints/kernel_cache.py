@@ -0,0 +1,114 @@
+"""
+Persistent Kernel Cache
+
+On-disk cache of kernel and distance matrices keyed by a content hash of the input array
+plus the kernel configuration (feature-map type, reps, entanglement, ...). Matrices are
+stored as '.npy' files and returned memory-mapped, and the cache is kept under a size
+bound by evicting the least recently used entries.
+
+Configuration:
+    QTDA_KERNEL_CACHE_DIR     cache directory (default '.cache/quantum_kernels')
+    QTDA_KERNEL_CACHE_MAX_MB  size bound in MiB (default 1024)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+KERNEL_SUFFIX = ".kernel.npy"
+DISTANCE_SUFFIX = ".distance.npy"
+
+
+class KernelCache:
+    """Size-bounded LRU cache of (kernel, distance) matrix pairs on disk."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv("QTDA_KERNEL_CACHE_DIR", ".cache/quantum_kernels")
+        self.max_bytes = max_bytes if max_bytes is not None else \
+            int(float(os.getenv("QTDA_KERNEL_CACHE_MAX_MB", 1024)) * 2**20)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data: np.ndarray, config: Dict[str, Any]) -> str:
+        """Content hash of the array (dtype, shape and bytes) and the kernel configuration."""
+        data = np.ascontiguousarray(data)
+        digest = hashlib.sha256()
+        digest.update(json.dumps(config, sort_keys=True).encode())
+        digest.update(f"{data.dtype.str}{data.shape}".encode())
+        digest.update(data.tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Memory-mapped (kernel, distance) for a key, or None on a miss."""
+        kernel_path, distance_path = self._path(key, KERNEL_SUFFIX), self._path(key, DISTANCE_SUFFIX)
+        try:
+            kernel = np.load(kernel_path, mmap_mode="r")
+            distance = np.load(distance_path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        # The modification time doubles as the LRU clock.
+        for path in (kernel_path, distance_path):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+        return kernel, distance
+
+    def put(self, key: str, kernel: np.ndarray, distance: np.ndarray):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for suffix, matrix in ((KERNEL_SUFFIX, kernel), (DISTANCE_SUFFIX, distance)):
+            # Write to a temporary file and rename so readers never see a partial matrix.
+            tmp_path = os.path.join(self.cache_dir, f".{uuid.uuid4().hex}.tmp.npy")
+            np.save(tmp_path, np.asarray(matrix))
+            os.replace(tmp_path, self._path(key, suffix))
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = {}
+            for name in os.listdir(self.cache_dir):
+                for suffix in (KERNEL_SUFFIX, DISTANCE_SUFFIX):
+                    if name.endswith(suffix):
+                        stat = os.stat(os.path.join(self.cache_dir, name))
+                        size, mtime = entries.get(name[:-len(suffix)], (0, 0.0))
+                        entries[name[:-len(suffix)]] = (size + stat.st_size, max(mtime, stat.st_mtime))
+            total = sum(size for size, _ in entries.values())
+            for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+                if total <= self.max_bytes:
+                    break
+                for suffix in (KERNEL_SUFFIX, DISTANCE_SUFFIX):
+                    try:
+                        os.remove(self._path(key, suffix))
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+    def get_or_compute(self, data: np.ndarray, config: Dict[str, Any],
+                       compute_kernel: Callable[[np.ndarray], np.ndarray],
+                       kernel_to_distance: Callable[[np.ndarray], np.ndarray]):
+        """
+        Cached (kernel, distance, hit) for 'data' under 'config'. A hit skips both the kernel
+        evaluation and the distance conversion.
+        """
+        key = self.key(data, config)
+        cached = self.get(key)
+        if cached is not None:
+            return cached[0], cached[1], True
+        kernel = compute_kernel(data)
+        distance = kernel_to_distance(kernel)
+        try:
+            self.put(key, kernel, distance)
+        except OSError as e:
+            print(f"⚠️ Could not write kernel cache entry: {e}")
+        return kernel, distance, False
+
+
+kernel_cache = KernelCache()
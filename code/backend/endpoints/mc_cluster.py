@@ -0,0 +1,323 @@
+"""
+Distributed Monte Carlo
+
+Coordinator/worker mode for the counter-based Monte Carlo engine. The coordinator splits
+the path range into shards and posts them to worker processes over a small JSON-over-HTTP
+protocol; workers return partial aggregates which the coordinator merges. Because every
+path is a pure function of (seed, path_index), a shard gives the same result on any worker
+and failed shards can simply be retried elsewhere; a shard is not retried on a worker it
+already failed on while another live worker remains.
+
+Workers bind to 127.0.0.1 by default; pass --host 0.0.0.0 (on a trusted network) to accept
+shards from other hosts, as the protocol has no authentication.
+
+Protocol:
+    GET  /health  -> {"status": "ok"}
+    POST /shard   {"input_data", "seed", "start", "stop", "bin_edges"} -> partial aggregates
+                  ('input_data' carries sigma and r resolved by the coordinator, never a 'pair')
+"""
+
+import argparse
+import json
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import requests
+
+from endpoints.monte_carlo import _build_simulator, new_path_seed
+
+# ------------------------------
+# Worker
+# ------------------------------
+def run_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Simulate paths [start, stop) and reduce them to mergeable aggregates."""
+    started = time.perf_counter()
+    simulator, _ = _build_simulator(task.get("input_data"))
+    start, stop = int(task["start"]), int(task["stop"])
+    terminal_prices = simulator.simulate_terminal_prices(int(task["seed"]), start=start, stop=stop)
+    _, discounted_payoffs = simulator.compute_option_price(terminal_prices)
+    bin_edges = np.asarray(task["bin_edges"])
+    counts, _ = np.histogram(terminal_prices, bins=bin_edges)
+    return {
+        "start": start,
+        "stop": stop,
+        "count": int(stop - start),
+        "payoff_mean": float(discounted_payoffs.mean()),
+        "payoff_m2": float(np.square(discounted_payoffs - discounted_payoffs.mean()).sum()),
+        "terminal_mean": float(terminal_prices.mean()),
+        "terminal_min": float(terminal_prices.min()),
+        "terminal_max": float(terminal_prices.max()),
+        "histogram_counts": counts.tolist(),
+        "histogram_underflow": int(np.count_nonzero(terminal_prices < bin_edges[0])),
+        "histogram_overflow": int(np.count_nonzero(terminal_prices > bin_edges[-1])),
+        "elapsed": time.perf_counter() - started
+    }
+
+
+class _ShardRequestHandler(BaseHTTPRequestHandler):
+    def _reply(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/shard":
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            task = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            self._reply(200, run_shard(task))
+        except Exception as e:
+            self._reply(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_worker(host: str = "127.0.0.1", port: int = 7001, ready=None):
+    """Run a shard worker until interrupted. 'ready' (a Connection) receives the bound port."""
+    server = ThreadingHTTPServer((host, port), _ShardRequestHandler)
+    if ready is not None:
+        ready.send(server.server_address[1])
+        ready.close()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def start_local_workers(num_workers: int, host: str = "127.0.0.1"):
+    """
+    Spawn 'num_workers' worker processes on free local ports.
+
+    Returns:
+        (processes, urls) - terminate the processes when done
+    """
+    processes, urls = [], []
+    for _ in range(num_workers):
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=serve_worker, args=(host, 0, child_conn), daemon=True)
+        process.start()
+        urls.append(f"http://{host}:{parent_conn.recv()}")
+        processes.append(process)
+    return processes, urls
+
+# ------------------------------
+# Coordinator
+# ------------------------------
+def _histogram_edges(simulator, bins: int) -> np.ndarray:
+    """
+    Fixed terminal-price bins (+/- 6 sigma of the log-normal law) shared by all shards; prices
+    outside them are counted in the underflow and overflow bins.
+    """
+    drift = np.log(simulator.S0) + (simulator.r - 0.5 * simulator.sigma**2) * simulator.T
+    spread = 6 * simulator.sigma * np.sqrt(simulator.T)
+    return np.linspace(np.exp(drift - spread), np.exp(drift + spread), bins + 1)
+
+
+def _merge_partials(partials: List[Dict[str, Any]]):
+    """
+    Merge per-shard (count, mean, M2) of the discounted payoffs, and the terminal-price
+    means, with Chan's pairwise update. Returns (count, payoff mean, payoff M2, terminal mean).
+    """
+    n, payoff_mean, payoff_m2, terminal_mean = 0, 0.0, 0.0, 0.0
+    for p in partials:
+        count = p["count"]
+        merged = n + count
+        delta = p["payoff_mean"] - payoff_mean
+        payoff_mean += delta * count / merged
+        payoff_m2 += p["payoff_m2"] + delta**2 * n * count / merged
+        terminal_mean += (p["terminal_mean"] - terminal_mean) * count / merged
+        n = merged
+    return n, payoff_mean, payoff_m2, terminal_mean
+
+
+def run_distributed_simulation(workers: List[str], input_data: Optional[Dict[str, Any]] = None,
+                               seed: Optional[int] = None, shard_size: int = 100_000,
+                               max_retries: int = 3, timeout: float = 600, bins: int = 30) -> Dict[str, Any]:
+    """
+    Price the classical-RNG simulation described by 'input_data' across 'workers'.
+
+    Args:
+        workers: Base URLs of running shard workers
+        input_data: Simulator overrides, as for quantum_monte_carlo_endpoint
+        seed: Counter-based seed; shards are deterministic for a given seed
+        shard_size: Paths per shard
+        max_retries: Attempts per shard, and consecutive failures before a worker is dropped.
+            A failed shard is retried on workers it has not failed on while any are alive
+        timeout: Per-shard HTTP timeout in seconds
+        bins: Number of terminal-price histogram bins
+
+    Returns:
+        Dictionary with the merged estimate, histogram and per-worker throughput
+    """
+    simulator, _ = _build_simulator(input_data)
+    seed = new_path_seed() if seed is None else int(seed)
+    bin_edges = _histogram_edges(simulator, bins)
+    # sigma and r are resolved once here and pinned in every task, so workers never
+    # calibrate a 'pair' from their own (possibly different or missing) price history.
+    shard_input = {**{k: v for k, v in (input_data or {}).items() if k != "pair"},
+                   "sigma": float(simulator.sigma), "r": float(simulator.r)}
+
+    # (start, stop, attempts, urls of the workers the shard failed on)
+    pending = [(start, min(start + shard_size, simulator.paths), 0, frozenset())
+               for start in range(0, simulator.paths, shard_size)]
+    num_shards = len(pending)
+
+    partials, failed_shards = [], []
+    stats = {url: {"url": url, "shards": 0, "paths": 0, "busy_seconds": 0.0, "failures": 0, "alive": True}
+             for url in workers}
+    lock = threading.Lock()
+
+    def take_shard(url):
+        with lock:
+            alive = {u for u in workers if stats[u]["alive"]}
+            for index, (_, _, _, failed_on) in enumerate(pending):
+                if url not in failed_on or alive <= failed_on:
+                    return pending.pop(index)
+        return None
+
+    def worker_loop(url):
+        consecutive_failures = 0
+        while True:
+            shard = take_shard(url)
+            if shard is None:
+                return
+            start, stop, attempts, failed_on = shard
+            task = {"input_data": shard_input, "seed": seed, "start": start, "stop": stop,
+                    "bin_edges": bin_edges.tolist()}
+            started = time.perf_counter()
+            try:
+                response = requests.post(f"{url}/shard", json=task, timeout=timeout)
+                response.raise_for_status()
+                partial = response.json()
+            except Exception as e:
+                print(f"⚠️ Shard [{start}, {stop}) failed on {url}: {e}")
+                with lock:
+                    stats[url]["failures"] += 1
+                    if attempts + 1 < max_retries:
+                        pending.append((start, stop, attempts + 1, failed_on | {url}))
+                    else:
+                        failed_shards.append([start, stop])
+                consecutive_failures += 1
+                if consecutive_failures >= max_retries:
+                    with lock:
+                        stats[url]["alive"] = False
+                    return
+                continue
+            consecutive_failures = 0
+            with lock:
+                partials.append(partial)
+                stats[url]["shards"] += 1
+                stats[url]["paths"] += partial["count"]
+                stats[url]["busy_seconds"] += time.perf_counter() - started
+
+    started = time.perf_counter()
+    # Retried shards can be requeued after the workers eligible for them have finished,
+    # so keep dispatching rounds while work and live workers remain.
+    while pending:
+        alive = [url for url in workers if stats[url]["alive"]]
+        if not alive:
+            failed_shards.extend([start, stop] for start, stop, _, _ in pending)
+            pending.clear()
+            break
+        threads = [threading.Thread(target=worker_loop, args=(url,)) for url in alive]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    worker_stats = []
+    for url in workers:
+        entry = dict(stats[url])
+        entry["paths_per_sec"] = entry["paths"] / entry["busy_seconds"] if entry["busy_seconds"] else 0.0
+        worker_stats.append(entry)
+
+    if failed_shards:
+        return {"error": f"{len(failed_shards)} of {num_shards} shards failed",
+                "failed_shards": sorted(failed_shards), "workers": worker_stats}
+
+    n, payoff_mean, payoff_m2, terminal_mean = _merge_partials(partials)
+    payoff_var = payoff_m2 / max(n - 1, 1)
+    counts = np.sum([p["histogram_counts"] for p in partials], axis=0)
+    return {
+        "seed": seed,
+        "sigma": float(simulator.sigma),
+        "r": float(simulator.r),
+        "paths": n,
+        "num_shards": num_shards,
+        "estimated_price": float(payoff_mean),
+        "standard_error": float(np.sqrt(payoff_var / n)),
+        "terminal_mean": float(terminal_mean),
+        "terminal_min": float(min(p["terminal_min"] for p in partials)),
+        "terminal_max": float(max(p["terminal_max"] for p in partials)),
+        "histogram": {
+            "bins": bin_edges.tolist(),
+            "counts": counts.tolist(),
+            "underflow": int(sum(p["histogram_underflow"] for p in partials)),
+            "overflow": int(sum(p["histogram_overflow"] for p in partials))
+        },
+        "elapsed": elapsed,
+        "paths_per_sec": n / elapsed if elapsed else 0.0,
+        "workers": worker_stats
+    }
+
+# ------------------------------
+# Command line
+# ------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed Monte Carlo coordinator/worker")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    worker_parser = subparsers.add_parser("worker", help="serve shards on this host")
+    worker_parser.add_argument("--host", default="127.0.0.1",
+                               help="bind address; 0.0.0.0 accepts shards from other hosts")
+    worker_parser.add_argument("--port", type=int, default=7001)
+
+    for name, help_text in [("coordinator", "distribute a run to remote workers"),
+                            ("local", "spawn workers on localhost and run")]:
+        sub = subparsers.add_parser(name, help=help_text)
+        if name == "coordinator":
+            sub.add_argument("--workers", required=True, help="comma-separated worker URLs")
+        else:
+            sub.add_argument("--num-workers", type=int, default=4)
+        sub.add_argument("--paths", type=int, default=1_000_000)
+        sub.add_argument("--steps", type=int, default=252)
+        sub.add_argument("--shard-size", type=int, default=100_000)
+        sub.add_argument("--seed", type=int, default=None)
+
+    args = parser.parse_args()
+    if args.mode == "worker":
+        serve_worker(args.host, args.port)
+    else:
+        processes = []
+        if args.mode == "local":
+            processes, worker_urls = start_local_workers(args.num_workers)
+        else:
+            worker_urls = args.workers.split(",")
+        try:
+            result = run_distributed_simulation(
+                worker_urls,
+                input_data={"paths": args.paths, "steps": args.steps},
+                seed=args.seed,
+                shard_size=args.shard_size
+            )
+            result.pop("histogram", None)
+            print(json.dumps(result, indent=2))
+        finally:
+            for process in processes:
+                process.terminate()
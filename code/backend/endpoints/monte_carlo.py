@@ -6,6 +6,7 @@ import json
 # Qiskit Imports for Quantum RNG & Amplitude Estimation
 # -----------------------------------------------------
 from qiskit import QuantumCircuit
+from qiskit.circuit.library import LinearAmplitudeFunction
 from qiskit_aer import Aer, AerSimulator
 from qiskit_algorithms import AmplitudeEstimation
 from qiskit_finance.applications import EuropeanCallPricing
@@ -13,6 +14,8 @@ from qiskit_finance.circuit.library import LogNormalDistribution
 from qiskit_algorithms.amplitude_estimators.estimation_problem import EstimationProblem
 from qiskit.primitives import Sampler
 
+from endpoints.calibration import calibration_cache
+
 # ------------------------------------------------------------------------------
 # Dummy Sampler implementation (for qiskit-aer 0.17.0)
 # ------------------------------------------------------------------------------
@@ -34,6 +37,55 @@ def european_call_payoff(S, strike):
     """European Call Option payoff function."""
     return np.maximum(S - strike, 0)
 
+def european_put_payoff(S, strike):
+    """European Put Option payoff function."""
+    return np.maximum(strike - S, 0)
+
+PAYOFFS = {
+    "call": european_call_payoff,
+    "put": european_put_payoff
+}
+
+VOLATILITY_MODELS = ("ewma", "realized")
+EXERCISE_STYLES = ("european", "american", "bermudan")
+
+def european_payoff_objective(option_type, num_qubits, strike, bounds, uncertainty_model):
+    """
+    State preparation and objective qubits for amplitude estimation of a European call or put
+    payoff, and the payoff range the estimate is rescaled by. The put uses the mirror image of
+    the call's piecewise-linear objective: strike - S below the strike and 0 above it.
+    """
+    if option_type == "call":
+        payoff_range = bounds[1] - strike
+        european_call = EuropeanCallPricing(
+            num_state_qubits=num_qubits,
+            strike_price=strike,
+            bounds=bounds,
+            uncertainty_model=uncertainty_model,
+            rescaling_factor=payoff_range
+        )
+        return european_call._state_preparation, european_call._objective_qubits, payoff_range
+    if option_type == "put":
+        payoff_range = strike - bounds[0]
+        objective = LinearAmplitudeFunction(
+            num_qubits,
+            slope=[-1, 0],
+            offset=[payoff_range, 0],
+            domain=bounds,
+            image=(0, payoff_range),
+            breakpoints=[bounds[0], strike],
+            rescaling_factor=payoff_range
+        )
+        state_preparation = QuantumCircuit(objective.num_qubits)
+        state_preparation.compose(uncertainty_model, range(uncertainty_model.num_qubits), inplace=True)
+        state_preparation.compose(objective, range(objective.num_qubits), inplace=True)
+        return state_preparation, uncertainty_model.num_qubits, payoff_range
+    raise ValueError(f"option_type must be one of {sorted(PAYOFFS)}.")
+
+def polynomial_basis(x, degree):
+    """Polynomial regression basis [1, x, ..., x^degree] evaluated for every entry of x."""
+    return np.vander(x, degree + 1, increasing=True)
+
 # -------------------------------------------------------------
 # Quantum Random Number Generation (via Qiskit/Qasm Simulator)
 # -------------------------------------------------------------
@@ -59,6 +111,38 @@ def quantum_random_increments(num_samples, dt, num_qubits=16):
     normals = quantum_random_normal(num_samples, num_qubits=num_qubits)
     return normals * np.sqrt(dt)
 
+# -------------------------------------------------------------
+# Counter-based RNG: every path is a pure function of (seed, path_index)
+# -------------------------------------------------------------
+PATH_BLOCK_SIZE = 256
+
+def block_generator(seed, block_index):
+    """
+    Philox generator for the block of paths [block_index * PATH_BLOCK_SIZE, (block_index + 1) *
+    PATH_BLOCK_SIZE). The seed is the Philox key and the block index occupies its own 64-bit
+    word of the counter, so streams never overlap and any block can be regenerated alone.
+    """
+    return np.random.Generator(np.random.Philox(key=seed, counter=[0, 0, block_index, 0]))
+
+def counter_based_normals(seed, path_indices, steps):
+    """
+    Standard normals of shape (len(path_indices), steps). Each block is drawn as one
+    (PATH_BLOCK_SIZE, steps) array and path i is row i % PATH_BLOCK_SIZE of its block, so a
+    path's draws depend only on (seed, i) while generation stays vectorized.
+    """
+    path_indices = np.asarray(path_indices, dtype=np.int64).reshape(-1)
+    normals = np.empty((len(path_indices), steps))
+    blocks = path_indices // PATH_BLOCK_SIZE
+    for block in np.unique(blocks):
+        rows = np.flatnonzero(blocks == block)
+        draws = block_generator(seed, int(block)).standard_normal((PATH_BLOCK_SIZE, steps))
+        normals[rows] = draws[path_indices[rows] % PATH_BLOCK_SIZE]
+    return normals
+
+def new_path_seed():
+    """Fresh seed small enough to round-trip through JSON clients unchanged."""
+    return int(np.random.SeedSequence().generate_state(1, np.uint32)[0])
+
 # -------------------------------------------------------------
 # Quantum Monte Carlo Simulator: Classical & QAE Methods
 # -------------------------------------------------------------
@@ -83,16 +167,49 @@ class QuantumMonteCarloSimulator:
         else:
             raise ValueError("rng_type must be either 'classical' or 'quantum'.")
 
-    def simulate_paths(self, rng_type='classical'):
+    def simulate_paths(self, rng_type='classical', dtype=np.float64):
         dt = self.T / self.steps
         time_grid = np.linspace(0, self.T, self.steps + 1)
-        paths = np.zeros((self.paths, self.steps + 1))
+        paths = np.zeros((self.paths, self.steps + 1), dtype=dtype)
         paths[:, 0] = self.S0
         for t in range(1, self.steps + 1):
             dW = self._get_rng_increments(size=self.paths, dt=dt, rng_type=rng_type)
             paths[:, t] = paths[:, t - 1] * np.exp((self.r - 0.5 * self.sigma**2) * dt + self.sigma * dW)
         return time_grid, paths
 
+    def _counter_based_log_paths(self, seed, path_indices):
+        """Cumulative log-returns, shape (len(path_indices), steps), for the given path indices."""
+        dt = self.T / self.steps
+        normals = counter_based_normals(seed, path_indices, self.steps)
+        return np.cumsum((self.r - 0.5 * self.sigma**2) * dt + self.sigma * np.sqrt(dt) * normals, axis=1)
+
+    def regenerate_paths(self, seed, path_indices):
+        """Rebuild individual paths of a counter-based simulation from its seed."""
+        time_grid = np.linspace(0, self.T, self.steps + 1)
+        paths = np.empty((len(path_indices), self.steps + 1))
+        paths[:, 0] = self.S0
+        if len(path_indices):
+            paths[:, 1:] = self.S0 * np.exp(self._counter_based_log_paths(seed, path_indices))
+        return time_grid, paths
+
+    def simulate_terminal_prices(self, seed, chunk_size=1024, start=0, stop=None):
+        """
+        Terminal prices of paths [start, stop) of a counter-based simulation. Paths are built
+        chunk by chunk and discarded, so memory is O(chunk_size * steps) regardless of the
+        number of paths; regenerate_paths reproduces any path exactly from the same seed.
+        """
+        stop = self.paths if stop is None else stop
+        terminal_prices = np.empty(stop - start)
+        for lo in range(start, stop, chunk_size):
+            hi = min(lo + chunk_size, stop)
+            terminal_prices[lo - start:hi - start] = self.S0 * np.exp(self._counter_based_log_paths(seed, range(lo, hi))[:, -1])
+        return terminal_prices
+
+    def run_counter_based_simulation(self, seed):
+        terminal_prices = self.simulate_terminal_prices(seed)
+        estimated_price, _ = self.compute_option_price(terminal_prices)
+        return terminal_prices, estimated_price
+
     def compute_option_price(self, terminal_prices):
         payoffs = self.pricing_model(terminal_prices, self.strike)
         discounted_payoffs = np.exp(-self.r * self.T) * payoffs
@@ -105,7 +222,99 @@ class QuantumMonteCarloSimulator:
         estimated_price, _ = self.compute_option_price(terminal_prices)
         return time_grid, paths, terminal_prices, estimated_price
 
-    def run_quantum_amplitude_estimation(self, num_eval_qubits=3):
+    def _exercise_times(self, exercise_style='american', exercise_dates=None):
+        """
+        Exercise times in (0, T]. American exercise uses every simulation step,
+        Bermudan exercise uses 'exercise_dates' equally spaced dates (or an explicit list of times).
+        """
+        if exercise_style == 'american':
+            return np.linspace(0, self.T, self.steps + 1)[1:]
+        elif exercise_style == 'bermudan':
+            if exercise_dates is None:
+                raise ValueError("exercise_dates is required for Bermudan exercise.")
+            if np.isscalar(exercise_dates):
+                return np.linspace(0, self.T, int(exercise_dates) + 1)[1:]
+            times = np.unique(np.asarray(exercise_dates, dtype=float))
+            if times[0] <= 0 or times[-1] > self.T:
+                raise ValueError("exercise_dates must lie in (0, T].")
+            # The final cash flow is always fixed at maturity.
+            return times if times[-1] == self.T else np.append(times, self.T)
+        else:
+            raise ValueError("exercise_style must be either 'american' or 'bermudan'.")
+
+    def price_early_exercise_option(self, exercise_style='american', exercise_dates=None,
+                                    basis_degree=3, chunk_size=16384, seed=None):
+        """
+        Price an American or Bermudan option with Longstaff-Schwartz least-squares Monte Carlo.
+
+        Paths are generated backwards in time with a Brownian bridge, so only the current
+        Brownian state, the realised cash flow and its exercise time are held per path.
+        At each exercise date the continuation value is regressed on a polynomial basis in
+        moneyness (S / strike) over the in-the-money paths; the normal equations are
+        accumulated chunk by chunk instead of building the full design matrix.
+        """
+        times = self._exercise_times(exercise_style, exercise_dates)
+        num_chunks = int(np.ceil(self.paths / chunk_size))
+        chunks = [slice(c * chunk_size, min((c + 1) * chunk_size, self.paths)) for c in range(num_chunks)]
+        rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(num_chunks)]
+        drift = self.r - 0.5 * self.sigma**2
+
+        # Terminal Brownian state and cash flows at maturity.
+        W = np.empty(self.paths)
+        for rng, sl in zip(rngs, chunks):
+            W[sl] = np.sqrt(times[-1]) * rng.standard_normal(sl.stop - sl.start)
+        S = self.S0 * np.exp(drift * times[-1] + self.sigma * W)
+        cash_flow = self.pricing_model(S, self.strike)
+        exercise_time = np.full(self.paths, times[-1])
+        num_basis = basis_degree + 1
+
+        for k in range(len(times) - 2, -1, -1):
+            t, t_next = times[k], times[k + 1]
+            # Brownian bridge from W(t_next) back to W(t), pinned at W(0) = 0.
+            for rng, sl in zip(rngs, chunks):
+                noise = rng.standard_normal(sl.stop - sl.start)
+                W[sl] = (t / t_next) * W[sl] + np.sqrt(t * (t_next - t) / t_next) * noise
+            S = self.S0 * np.exp(drift * t + self.sigma * W)
+            exercise_value = self.pricing_model(S, self.strike)
+
+            # Accumulate X^T X and X^T y over in-the-money paths, one chunk at a time.
+            XtX = np.zeros((num_basis, num_basis))
+            Xty = np.zeros(num_basis)
+            for sl in chunks:
+                itm = exercise_value[sl] > 0
+                if not np.any(itm):
+                    continue
+                X = polynomial_basis(S[sl][itm] / self.strike, basis_degree)
+                y = cash_flow[sl][itm] * np.exp(-self.r * (exercise_time[sl][itm] - t))
+                XtX += X.T @ X
+                Xty += X.T @ y
+            if XtX[0, 0] == 0:
+                continue
+            beta = np.linalg.lstsq(XtX, Xty, rcond=None)[0]
+
+            for sl in chunks:
+                itm = exercise_value[sl] > 0
+                if not np.any(itm):
+                    continue
+                continuation = polynomial_basis(S[sl][itm] / self.strike, basis_degree) @ beta
+                exercise_now = np.flatnonzero(itm)[exercise_value[sl][itm] > continuation] + sl.start
+                cash_flow[exercise_now] = exercise_value[exercise_now]
+                exercise_time[exercise_now] = t
+
+        discounted_payoffs = cash_flow * np.exp(-self.r * exercise_time)
+        continuation_price = np.mean(discounted_payoffs)
+        immediate_exercise = float(self.pricing_model(np.array([self.S0]), self.strike)[0])
+        return {
+            "exercise_style": exercise_style,
+            "num_exercise_dates": int(len(times)),
+            "basis_degree": int(basis_degree),
+            "estimated_price": float(max(continuation_price, immediate_exercise)),
+            "standard_error": float(np.std(discounted_payoffs, ddof=1) / np.sqrt(self.paths)),
+            "early_exercise_fraction": float(np.mean(exercise_time < times[-1])),
+            "mean_exercise_time": float(np.mean(exercise_time))
+        }
+
+    def run_quantum_amplitude_estimation(self, num_eval_qubits=3, option_type="call"):
         # Use a fixed number of state qubits for the uncertainty model:
         num_qubits = 3
         bounds = (0, 2 * self.S0)
@@ -118,20 +327,15 @@ class QuantumMonteCarloSimulator:
             sigma=sigma_tilde,
             bounds=bounds
         )
-        european_call = EuropeanCallPricing(
-            num_state_qubits=num_qubits,
-            strike_price=self.strike,
-            bounds=bounds,
-            uncertainty_model=uncertainty_model,
-            rescaling_factor=(bounds[1] - self.strike)
+        state_preparation, objective_qubits, rescaling_factor = european_payoff_objective(
+            option_type, num_qubits, self.strike, bounds, uncertainty_model
         )
         sampler = Sampler()
         ae = AmplitudeEstimation(num_eval_qubits=num_eval_qubits, sampler=sampler)
-        rescaling_factor = bounds[1] - self.strike
 
         problem = EstimationProblem(
-            state_preparation=european_call._state_preparation,
-            objective_qubits=european_call._objective_qubits,
+            state_preparation=state_preparation,
+            objective_qubits=objective_qubits,
             post_processing=lambda x: x * rescaling_factor
         )
         result = ae.estimate(problem)
@@ -140,7 +344,7 @@ class QuantumMonteCarloSimulator:
 # ------------------------------------------------------------------------------
 # The API endpoint function that collects all simulation data into JSON.
 # ------------------------------------------------------------------------------
-def quantum_monte_carlo_endpoint(input_data=None, normalize=True, sim_qubits=4, max_eval_qubits=6):
+def _build_simulator(input_data=None):
     # Default parameters (override with input_data if provided)
     defaults = {
         "S0": 100,
@@ -149,12 +353,39 @@ def quantum_monte_carlo_endpoint(input_data=None, normalize=True, sim_qubits=4,
         "T": 1.0,
         "strike": 100,
         "steps": 252,
-        "paths": 1000
+        "paths": 1000,
+        "option_type": "call",
+        "exercise_style": "european",
+        "exercise_dates": None,
+        "basis_degree": 3,
+        "seed": None,
+        "pair": None,
+        "calibration_window": 30,
+        "volatility_model": "ewma",
+        "calibrate_drift": False
     }
     if input_data is not None:
         params = {**defaults, **input_data}
     else:
         params = defaults
+    if params["option_type"] not in PAYOFFS:
+        raise ValueError(f"option_type must be one of {sorted(PAYOFFS)}.")
+    if params["volatility_model"] not in VOLATILITY_MODELS:
+        raise ValueError(f"volatility_model must be one of {VOLATILITY_MODELS}.")
+
+    # A 'pair' pulls sigma from the cached calibration unless it was given explicitly.
+    # Pricing stays risk-neutral; the historical drift replaces r only on request, and
+    # never an explicit r (as when regenerating paths of an earlier run).
+    if params["pair"] is not None:
+        try:
+            calibration = calibration_cache.get(params["pair"], int(params["calibration_window"]))
+        except KeyError as e:
+            raise ValueError(e.args[0])
+        if "sigma" not in input_data:
+            params["sigma"] = calibration[f"{params['volatility_model']}_volatility"]
+        if params["calibrate_drift"] and "r" not in input_data:
+            params["r"] = calibration["drift"]
+        params["calibration"] = calibration
 
     simulator = QuantumMonteCarloSimulator(
         S0=params["S0"],
@@ -163,14 +394,36 @@ def quantum_monte_carlo_endpoint(input_data=None, normalize=True, sim_qubits=4,
         T=params["T"],
         strike=params["strike"],
         steps=params["steps"],
-        paths=params["paths"]
+        paths=params["paths"],
+        pricing_model=PAYOFFS[params["option_type"]]
     )
+    # Early-exercise settings are checked here rather than after the European runs.
+    if params["exercise_style"] not in EXERCISE_STYLES:
+        raise ValueError(f"exercise_style must be one of {EXERCISE_STYLES}.")
+    if params["exercise_style"] != "european":
+        simulator._exercise_times(params["exercise_style"], params["exercise_dates"])
+    return simulator, params
+
+def quantum_monte_carlo_endpoint(input_data=None, normalize=True, sim_qubits=4, max_eval_qubits=6):
+    try:
+        simulator, params = _build_simulator(input_data)
+    except ValueError as e:
+        return {"error": str(e)}
+    seed = params["seed"] if params["seed"] is not None else new_path_seed()
 
-    time_grid_class, paths_class, term_prices_class, est_price_class = simulator.run_classical_simulation(rng_type='classical')
-    sample_paths_class = paths_class[:10, :].tolist()
+    # Classical RNG paths are counter-based: only terminal prices are kept and the sample
+    # paths are regenerated from the seed (see regenerate_paths_endpoint for drill-down).
+    term_prices_class, est_price_class = simulator.run_counter_based_simulation(seed)
+    time_grid_class, paths_class = simulator.regenerate_paths(seed, range(min(10, simulator.paths)))
+    sample_paths_class = paths_class.tolist()
     time_grid_list = time_grid_class.tolist()
     hist_counts_class, hist_bins_class = np.histogram(term_prices_class, bins=30)
     classical_simulation_data = {
+        "seed": seed,
+        # With a 'pair' these come from the calibration at run time; pass them back to
+        # regenerate_paths_endpoint so later recalibration cannot change the paths.
+        "sigma": float(simulator.sigma),
+        "r": float(simulator.r),
         "time_grid": time_grid_list,
         "sample_paths": sample_paths_class,
         "terminal_prices": term_prices_class.tolist(),
@@ -196,7 +449,8 @@ def quantum_monte_carlo_endpoint(input_data=None, normalize=True, sim_qubits=4,
         }
     }
 
-    result_qae = simulator.run_quantum_amplitude_estimation(num_eval_qubits=sim_qubits)
+    result_qae = simulator.run_quantum_amplitude_estimation(num_eval_qubits=sim_qubits,
+                                                            option_type=params["option_type"])
     qae_samples = []
     if isinstance(result_qae.samples, dict):
         for val, prob in result_qae.samples.items():
@@ -208,23 +462,18 @@ def quantum_monte_carlo_endpoint(input_data=None, normalize=True, sim_qubits=4,
     }
 
     bounds = (0, 5 * simulator.S0)
-    rescaling_factor = bounds[1] - simulator.strike
-    _, _, _, classical_price = simulator.run_classical_simulation(rng_type='classical')
+    classical_price = est_price_class
     estimates, ci_lowers, ci_uppers = [], [], []
     for q in range(1, max_eval_qubits + 1):
         mu = np.log(simulator.S0) + (simulator.r - 0.5 * simulator.sigma**2) * simulator.T
         sigma_tilde = simulator.sigma * np.sqrt(simulator.T)
         uncertainty_model = LogNormalDistribution(num_qubits=sim_qubits, mu=mu, sigma=sigma_tilde, bounds=bounds)
-        european_call = EuropeanCallPricing(
-            num_state_qubits=sim_qubits,
-            strike_price=simulator.strike,
-            bounds=bounds,
-            uncertainty_model=uncertainty_model,
-            rescaling_factor=rescaling_factor
+        state_preparation, objective_qubits, rescaling_factor = european_payoff_objective(
+            params["option_type"], sim_qubits, simulator.strike, bounds, uncertainty_model
         )
         problem = EstimationProblem(
-            state_preparation=european_call._state_preparation,
-            objective_qubits=european_call._objective_qubits,
+            state_preparation=state_preparation,
+            objective_qubits=objective_qubits,
             post_processing=lambda x: x * rescaling_factor
         )
         ae = AmplitudeEstimation(num_eval_qubits=q, sampler=Sampler())
@@ -247,12 +496,50 @@ def quantum_monte_carlo_endpoint(input_data=None, normalize=True, sim_qubits=4,
         "classical_norm": float(classical_norm)
     }
 
-    return {
+    output = {
         "classical_rng_simulation": classical_simulation_data,
         "quantum_rng_simulation": quantum_simulation_data,
         "quantum_amplitude_estimation": qae_data,
         "qae_learning_curve": qae_learning_data
     }
+    if params["pair"] is not None:
+        output["calibration"] = params["calibration"]
+    if params["exercise_style"] != "european":
+        output["early_exercise_pricing"] = simulator.price_early_exercise_option(
+            exercise_style=params["exercise_style"],
+            exercise_dates=params["exercise_dates"],
+            basis_degree=params["basis_degree"],
+            seed=seed
+        )
+    return output
+
+def regenerate_paths_endpoint(input_data=None, seed=None, path_indices=None, sigma=None, r=None):
+    """
+    Regenerate individual classical-RNG paths of an earlier simulation for plotting.
+    'input_data' must match the original request, and 'seed', 'sigma' and 'r' are the values
+    it returned; they take precedence over a calibration, which may have been refreshed since.
+    """
+    if seed is None:
+        return {"error": "seed not provided"}
+    overrides = {name: float(value) for name, value in (("sigma", sigma), ("r", r)) if value is not None}
+    try:
+        simulator, _ = _build_simulator({**(input_data or {}), **overrides})
+    except ValueError as e:
+        return {"error": str(e)}
+    path_indices = list(range(min(10, simulator.paths))) if path_indices is None else [int(i) for i in path_indices]
+    invalid = [i for i in path_indices if not 0 <= i < simulator.paths]
+    if invalid:
+        return {"error": f"path indices out of range [0, {simulator.paths}): {invalid}"}
+
+    time_grid, paths = simulator.regenerate_paths(int(seed), path_indices)
+    return {
+        "seed": int(seed),
+        "sigma": float(simulator.sigma),
+        "r": float(simulator.r),
+        "time_grid": time_grid.tolist(),
+        "path_indices": path_indices,
+        "paths": paths.tolist()
+    }
 
 if __name__ == "__main__":
     # Example: run with overrides
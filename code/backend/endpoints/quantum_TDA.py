@@ -1,6 +1,18 @@
+import multiprocessing
+import os
+import threading
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
 import numpy as np
 from ripser import ripser
-from sklearn.metrics.pairwise import rbf_kernel
+from threadpoolctl import threadpool_limits
+from sklearn.metrics.pairwise import rbf_kernel, euclidean_distances
+from sklearn.cluster import kmeans_plusplus
+from sklearn.neighbors import NearestNeighbors
+from scipy.sparse import coo_matrix
 from sklearn.datasets import make_circles, make_swiss_roll
 
 # Qiskit Imports
@@ -8,7 +20,16 @@ from qiskit.primitives import Sampler
 from qiskit_algorithms.state_fidelities import ComputeUncompute
 from qiskit_machine_learning.kernels import FidelityQuantumKernel
 from qiskit.circuit.library import ZZFeatureMap, PauliFeatureMap
-import pandas as pd
+from qiskit import transpile
+from qiskit_aer import AerSimulator
+
+from endpoints.datasets import dataset_registry
+from endpoints.diagram_distances import check_metrics, compare_diagram_sets
+from endpoints.feature_reduction import reduce_to_qubit_budget
+from endpoints.kernel_cache import kernel_cache
+from endpoints.persistence_summaries import diagram_range, summarize_diagrams
+from endpoints.pipeline import StageGraph, StageTimings
+from endpoints.serialization import MATRIX_FORMATS, encode_matrix, sanitize_for_json
 
 # ------------------------------
 # Data Generation Functions
@@ -36,20 +57,287 @@ def generate_swiss_roll(n_points=200, noise=0.1):
 # ------------------------------
 # Quantum Kernel Computations
 # ------------------------------
-def compute_quantum_kernel_matrix(data: np.ndarray, use_pauli: bool = False) -> np.ndarray:
+def feature_map_config(use_pauli: bool = False) -> dict:
+    """Feature-map settings; also part of the kernel cache key."""
+    if use_pauli:
+        return {"type": "pauli", "reps": 3, "entanglement": "full"}
+    return {"type": "zz", "reps": 10, "entanglement": "full"}
+
+class FeatureMapTemplate:
+    """
+    A feature map built and transpiled once for the Aer simulator. Every evaluation only
+    binds parameter values into 'statevector_circuit'; 'transpiled' (without the save
+    instruction) backs the fidelity kernel, whose own circuit cache lives as long as the template.
+    """
+
+    def __init__(self, num_features: int, map_type: str, reps: int, entanglement: str):
+        feature_map_class = PauliFeatureMap if map_type == "pauli" else ZZFeatureMap
+        self.circuit = feature_map_class(feature_dimension=num_features, reps=reps, entanglement=entanglement)
+        self.transpiled = transpile(self.circuit, AerSimulator(method="statevector"))
+        self.statevector_circuit = self.transpiled.copy()
+        self.statevector_circuit.save_statevector()
+        self.parameters = list(self.transpiled.parameters)
+        self._fidelity_kernel = None
+
+    @property
+    def num_qubits(self) -> int:
+        return self.transpiled.num_qubits
+
+    def fidelity_kernel(self) -> FidelityQuantumKernel:
+        if self._fidelity_kernel is None:
+            self._fidelity_kernel = FidelityQuantumKernel(feature_map=self.transpiled,
+                                                          fidelity=ComputeUncompute(sampler=Sampler()))
+        return self._fidelity_kernel
+
+@lru_cache(maxsize=32)
+def _cached_template(num_features: int, map_type: str, reps: int, entanglement: str) -> FeatureMapTemplate:
+    return FeatureMapTemplate(num_features, map_type, reps, entanglement)
+
+def template_from_config(num_features: int, config: dict) -> FeatureMapTemplate:
+    """Transpiled feature-map template, cached per (dimension, map type, reps, entanglement)."""
+    return _cached_template(num_features, config["type"], int(config["reps"]), config["entanglement"])
+
+def feature_map_template(num_features: int, use_pauli: bool = False) -> FeatureMapTemplate:
+    """Template of the default feature map (see feature_map_config)."""
+    return template_from_config(num_features, feature_map_config(use_pauli))
+
+def feature_map_statevectors(template: FeatureMapTemplate, data: np.ndarray, batch_size: int = 1024,
+                             max_parallel_threads: int = 0) -> np.ndarray:
+    """
+    Simulate the feature-map state of every sample once.
+    Each batch of samples runs as parameter bindings of the template's pre-transpiled
+    circuit in a single Aer statevector job.
+    Returns an (N, 2**num_qubits) complex matrix whose rows are the encoded states.
+    """
+    simulator = AerSimulator(method="statevector", max_parallel_threads=max_parallel_threads)
+    circuit, parameters = template.statevector_circuit, template.parameters
+
+    states = np.empty((len(data), 2 ** template.num_qubits), dtype=complex)
+    for start in range(0, len(data), batch_size):
+        batch = data[start:start + batch_size]
+        binds = [{param: batch[:, k].tolist() for k, param in enumerate(parameters)}]
+        result = simulator.run(circuit, parameter_binds=binds).result()
+        for i in range(len(batch)):
+            states[start + i] = np.asarray(result.get_statevector(i))
+    return states
+
+def statevector_kernel(states_x: np.ndarray, states_y: np.ndarray = None) -> np.ndarray:
+    """Fidelity kernel K(i,j) = |<psi_i|psi_j>|^2 from stacked statevectors, as one matrix product."""
+    if states_y is None:
+        states_y = states_x
+    return np.abs(states_x.conj() @ states_y.T) ** 2
+
+KERNEL_METHODS = ("statevector", "fidelity")
+
+def compute_quantum_kernel_matrix(data: np.ndarray, use_pauli: bool = False, method: str = "statevector",
+                                  y_data: np.ndarray = None) -> np.ndarray:
     """
     Build a quantum kernel using either PauliFeatureMap or ZZFeatureMap,
-    and evaluate the kernel matrix for the input data.
+    and evaluate the kernel matrix for the input data (or between data and y_data).
+
+    method:
+    - "statevector": exact, noise-free kernel from N statevector simulations and one Gram product
+    - "fidelity": FidelityQuantumKernel with ComputeUncompute, one circuit per pair of samples
     """
-    if use_pauli:
-        feature_map = PauliFeatureMap(feature_dimension=data.shape[1], reps=3, entanglement='full')
+    template = feature_map_template(data.shape[1], use_pauli=use_pauli)
+
+    if method == "statevector":
+        states = feature_map_statevectors(template, data)
+        if y_data is None:
+            return statevector_kernel(states)
+        return statevector_kernel(states, feature_map_statevectors(template, y_data))
+    elif method == "fidelity":
+        return template.fidelity_kernel().evaluate(x_vec=data, y_vec=y_data)
+    else:
+        raise ValueError(f"method must be one of {KERNEL_METHODS}.")
+
+# ------------------------------
+# Tiled Parallel Kernel Evaluation
+# ------------------------------
+_tile_pool = None
+_tile_pool_lock = threading.Lock()
+
+def _init_tile_worker():
+    threadpool_limits(1)
+
+def _tile_pool_executor() -> ProcessPoolExecutor:
+    """Process pool shared by every parallel kernel evaluation, started on first use with one worker per CPU."""
+    global _tile_pool
+    with _tile_pool_lock:
+        if _tile_pool is None:
+            # Spawned workers avoid forking a parent whose OpenMP/BLAS thread pools are already running.
+            _tile_pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_tile_worker)
+        return _tile_pool
+
+def _discard_tile_pool(pool):
+    """Drop a broken pool so the next call starts a fresh one."""
+    global _tile_pool
+    with _tile_pool_lock:
+        if _tile_pool is pool:
+            _tile_pool = None
+
+def _simulate_state_block(job, buffers, bounds):
+    start, stop = bounds
+    template = feature_map_template(job["data"].shape[1], use_pauli=job["use_pauli"])
+    buffers["states"][start:stop] = feature_map_statevectors(template, job["data"][start:stop], max_parallel_threads=1)
+
+def _evaluate_tile(job, buffers, tile):
+    i0, i1, j0, j1 = tile
+    if "states" in buffers:
+        block = statevector_kernel(buffers["states"][i0:i1], buffers["states"][j0:j1])
+    else:
+        data = job["data"]
+        block = compute_quantum_kernel_matrix(data[i0:i1], use_pauli=job["use_pauli"], method=job["method"],
+                                              y_data=None if (i0, i1) == (j0, j1) else data[j0:j1])
+    buffers["result"][i0:i1, j0:j1] = block
+
+def _run_tile_task(step, job, items):
+    """Attach to the job's shared buffers, run 'step' on each item (writing in place) and detach."""
+    shms, buffers = [], {}
+    try:
+        for name, (shm_name, shape, dtype) in job["buffers"].items():
+            shm = shared_memory.SharedMemory(name=shm_name)
+            shms.append(shm)
+            buffers[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        for item in items:
+            step(job, buffers, item)
+    finally:
+        buffers.clear()
+        for shm in shms:
+            shm.close()
+
+def compute_quantum_kernel_matrix_parallel(data: np.ndarray, use_pauli: bool = False, method: str = "statevector",
+                                           tile_size: int = 256, num_workers: int = None) -> np.ndarray:
+    """
+    Evaluate the quantum kernel in upper-triangular tiles across the shared process pool.
+
+    Tiles are written straight into a shared-memory result buffer (nothing is pickled back)
+    and the lower triangle is filled by symmetry. With method="statevector" the pool first
+    simulates the states in row blocks into a shared buffer, then forms the Gram tiles.
+    The work is split into at most num_workers tasks (capped at os.cpu_count()), so one
+    call never occupies more workers than requested.
+    """
+    n = len(data)
+    num_workers = max(1, min(num_workers or os.cpu_count(), os.cpu_count()))
+    bounds = [(start, min(start + tile_size, n)) for start in range(0, n, tile_size)]
+    tiles = [(i0, i1, j0, j1) for a, (i0, i1) in enumerate(bounds) for (j0, j1) in bounds[a:]]
+
+    shms, result = [], None
+    try:
+        result_shm = shared_memory.SharedMemory(create=True, size=max(n * n * 8, 1))
+        shms.append(result_shm)
+        result = np.ndarray((n, n), dtype=np.float64, buffer=result_shm.buf)
+        job = {"data": np.asarray(data), "use_pauli": use_pauli, "method": method,
+               "buffers": {"result": (result_shm.name, (n, n), np.float64)}}
+        if method == "statevector":
+            dim = 2 ** data.shape[1]
+            states_shm = shared_memory.SharedMemory(create=True, size=max(n * dim * 16, 1))
+            shms.append(states_shm)
+            job["buffers"]["states"] = (states_shm.name, (n, dim), np.complex128)
+
+        pool = _tile_pool_executor()
+        steps = [(_simulate_state_block, bounds)] if method == "statevector" else []
+        try:
+            for step, items in steps + [(_evaluate_tile, tiles)]:
+                list(pool.map(_run_tile_task, [step] * num_workers, [job] * num_workers,
+                              [items[w::num_workers] for w in range(num_workers)]))
+        except BrokenProcessPool:
+            _discard_tile_pool(pool)
+            raise
+
+        lower = np.tril_indices(n, -1)
+        result[lower] = result.T[lower]
+        return np.array(result)
+    finally:
+        del result
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+# ------------------------------
+# Nystrom Low-Rank Approximation
+# ------------------------------
+LANDMARK_METHODS = ("kmeans++", "leverage")
+
+def select_landmarks(data: np.ndarray, num_landmarks: int, method: str = "kmeans++",
+                     cross_kernel=None, ridge: float = 1e-2, seed: int = 0) -> np.ndarray:
+    """
+    Choose landmark indices for the Nystrom approximation.
+
+    method:
+    - "kmeans++": k-means++ seeding in the input space
+    - "leverage": sampling by approximate ridge leverage scores in kernel space, estimated
+      from a uniform pilot set; needs 'cross_kernel(idx) -> K(data, data[idx])'
+    """
+    rng = np.random.default_rng(seed)
+    n = len(data)
+    if num_landmarks >= n:
+        return np.arange(n)
+    if method == "kmeans++":
+        _, indices = kmeans_plusplus(np.asarray(data, dtype=float), n_clusters=num_landmarks, random_state=seed)
+        return np.sort(indices)
+    elif method == "leverage":
+        pilot = np.sort(rng.choice(n, size=min(n, 2 * num_landmarks), replace=False))
+        K_np = cross_kernel(pilot)
+        K_pp = K_np[pilot]
+        # l_i = (K_ii - K_iP (K_PP + ridge I)^-1 K_Pi) / ridge, with K_ii = 1 for fidelity kernels
+        projected = np.linalg.solve(K_pp + ridge * np.eye(len(pilot)), K_np.T)
+        scores = np.maximum((1.0 - np.einsum("ij,ji->i", K_np, projected)) / ridge, 1e-12)
+        return np.sort(rng.choice(n, size=num_landmarks, replace=False, p=scores / scores.sum()))
+    else:
+        raise ValueError(f"landmark method must be one of {LANDMARK_METHODS}.")
+
+def nystrom_quantum_kernel(data: np.ndarray, num_landmarks: int, use_pauli: bool = False,
+                           method: str = "statevector", landmark_method: str = "kmeans++",
+                           num_check_pairs: int = 500, seed: int = 0):
+    """
+    Nystrom approximation K ~ F F^T of the quantum kernel from the N x m block against
+    m landmarks, so kernel work is O(N*m) instead of O(N^2).
+
+    Returns (factors, diagnostics): F has shape (N, rank); the diagnostics compare the
+    approximation with exact kernel entries on a random sample of pairs.
+    """
+    template = feature_map_template(data.shape[1], use_pauli=use_pauli)
+    if method == "statevector":
+        states = feature_map_statevectors(template, data)
+        cross_kernel = lambda idx: statevector_kernel(states, states[idx])
     else:
-        feature_map = ZZFeatureMap(feature_dimension=data.shape[1], reps=10, entanglement='full')
+        cross_kernel = lambda idx: compute_quantum_kernel_matrix(data, use_pauli=use_pauli, method=method,
+                                                                 y_data=data[idx])
+
+    landmarks = select_landmarks(data, num_landmarks, method=landmark_method, cross_kernel=cross_kernel, seed=seed)
+    C = cross_kernel(landmarks)
+    W = C[landmarks]
 
-    sampler = Sampler()
-    fidelity = ComputeUncompute(sampler=sampler)
-    quantum_kernel = FidelityQuantumKernel(feature_map=feature_map, fidelity=fidelity)
-    return quantum_kernel.evaluate(x_vec=data)
+    # F = C W^{-1/2}, dropping numerically null directions of W.
+    eigvals, eigvecs = np.linalg.eigh((W + W.T) / 2)
+    keep = eigvals > eigvals.max() * 1e-10
+    factors = C @ (eigvecs[:, keep] / np.sqrt(eigvals[keep]))
+
+    # Exact (noise-free) entries for a random sample of pairs.
+    rng = np.random.default_rng(seed)
+    i, j = rng.integers(0, len(data), size=(2, num_check_pairs))
+    if method == "statevector":
+        exact = np.abs(np.einsum("ij,ij->i", states[i].conj(), states[j])) ** 2
+    else:
+        pair_states = feature_map_statevectors(template, data[np.concatenate([i, j])])
+        exact = np.abs(np.einsum("ij,ij->i", pair_states[:num_check_pairs].conj(), pair_states[num_check_pairs:])) ** 2
+    approx = np.einsum("ij,ij->i", factors[i], factors[j])
+    diagnostics = {
+        "num_landmarks": int(len(landmarks)),
+        "landmark_method": landmark_method,
+        "rank": int(keep.sum()),
+        "diagonal_mean_abs_error": float(np.mean(np.abs(1.0 - np.einsum("ij,ij->i", factors, factors)))),
+        "sampled_pairs": int(num_check_pairs),
+        "sampled_max_abs_error": float(np.max(np.abs(approx - exact))),
+        "sampled_relative_frobenius_error": float(np.linalg.norm(approx - exact) / max(np.linalg.norm(exact), 1e-12))
+    }
+    return factors, diagnostics
+
+def factors_to_distance(factors: np.ndarray) -> np.ndarray:
+    """Kernel distances implied by K = F F^T, i.e. Euclidean distances between the rows of F."""
+    return euclidean_distances(factors)
 
 def kernel_to_distance(kernel_matrix: np.ndarray) -> np.ndarray:
     """
@@ -59,18 +347,147 @@ def kernel_to_distance(kernel_matrix: np.ndarray) -> np.ndarray:
     diag = np.diag(kernel_matrix)
     return np.sqrt(np.abs(diag[:, None] + diag[None, :] - 2 * kernel_matrix))
 
-def compute_persistence(distance_matrix: np.ndarray):
+def compute_persistence(distance_matrix: np.ndarray, maxdim: int = 1, thresh: float = np.inf,
+                        n_perm: int = None, return_info: bool = False):
     """
     Compute persistent homology of a distance matrix using ripser.
     Returns the persistence diagrams.
+
+    - maxdim: highest homology dimension
+    - thresh: maximum edge length in the Rips filtration (deaths beyond it are infinite)
+    - n_perm: number of greedy-permutation landmarks to compute the filtration on
+    With return_info, also returns the landmark covering radius (the approximation bound).
+    """
+    n_perm = n_perm if n_perm is not None and n_perm < distance_matrix.shape[0] else None
+    result = ripser(distance_matrix, distance_matrix=True, maxdim=maxdim, thresh=thresh, n_perm=n_perm)
+    if return_info:
+        return result['dgms'], {"r_cover": float(result.get('r_cover', 0.0))}
+    return result['dgms']
+
+def auto_persistence_settings(num_points: int, maxdim=None, n_perm=None) -> dict:
+    """
+    Default ripser settings by point count: exact H0/H1 up to 1000 points, then
+    greedy-permutation landmarks growing like 10*sqrt(N); H1 is dropped beyond 20000 points.
+    """
+    if maxdim is None:
+        maxdim = 1 if num_points <= 20000 else 0
+    if n_perm is None and num_points > 1000:
+        n_perm = min(num_points, max(1000, int(10 * np.sqrt(num_points))))
+    return {"maxdim": int(maxdim), "n_perm": None if n_perm is None else int(n_perm)}
+
+def auto_threshold(distance_matrix: np.ndarray, thresh=None, quantile: float = 0.75,
+                   num_samples: int = 100000, seed: int = 0) -> float:
+    """
+    Rips threshold: unlimited up to 2000 points, otherwise the given quantile of a random
+    sample of pairwise distances.
+    """
+    if thresh is not None:
+        return float(thresh)
+    n = len(distance_matrix)
+    if n <= 2000:
+        return np.inf
+    i, j = np.random.default_rng(seed).integers(0, n, size=(2, num_samples))
+    return float(np.quantile(np.asarray(distance_matrix[i, j]), quantile))
+
+# ------------------------------
+# Sparse kNN Filtrations
+# ------------------------------
+def _symmetric_knn_graph(rows: np.ndarray, cols: np.ndarray, dists: np.ndarray, n: int) -> coo_matrix:
+    """Symmetrised sparse kNN graph (an edge kept if either endpoint lists the other)."""
+    keep = rows != cols
+    # Explicit zeros (duplicate points) would vanish from the sparse structure.
+    dists = np.maximum(dists[keep], 1e-12)
+    graph = coo_matrix((dists, (rows[keep], cols[keep])), shape=(n, n)).tocsr()
+    return graph.maximum(graph.T).tocoo()
+
+def euclidean_knn_graph(points: np.ndarray, k: int, transform=None) -> coo_matrix:
+    """kNN graph from a tree-based neighbour search; 'transform' maps Euclidean to kernel distances."""
+    n = len(points)
+    dists, idx = NearestNeighbors(n_neighbors=min(k + 1, n)).fit(points).kneighbors(points)
+    if transform is not None:
+        dists = transform(dists)
+    return _symmetric_knn_graph(np.repeat(np.arange(n), idx.shape[1]), idx.ravel(), dists.ravel(), n)
+
+def rbf_knn_graph(data: np.ndarray, k: int, gamma: float) -> coo_matrix:
     """
-    return ripser(distance_matrix, distance_matrix=True)['dgms']
+    kNN graph under the RBF kernel distance sqrt(2 - 2 exp(-gamma r^2)), which is monotone in
+    the Euclidean distance r, so neighbours come from a kd/ball tree without any N x N matrix.
+    """
+    return euclidean_knn_graph(data, k, lambda r: np.sqrt(np.maximum(2 - 2 * np.exp(-gamma * r**2), 0)))
+
+def knn_graph_from_rows(row_distances, n: int, k: int, chunk_size: int = 1024) -> coo_matrix:
+    """kNN graph from a callable returning distance rows [start, stop) x N, one chunk at a time."""
+    k = min(k, n - 1)
+    rows, cols, dists = [], [], []
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        block = np.array(row_distances(start, stop), dtype=float)
+        block[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        idx = np.argpartition(block, k - 1, axis=1)[:, :k]
+        rows.append(np.repeat(np.arange(start, stop), k))
+        cols.append(idx.ravel())
+        dists.append(np.take_along_axis(block, idx, axis=1).ravel())
+    return _symmetric_knn_graph(np.concatenate(rows), np.concatenate(cols), np.concatenate(dists), n)
+
+def quantum_knn_graph(states: np.ndarray, k: int, chunk_size: int = 1024) -> coo_matrix:
+    """kNN graph under the quantum kernel distance sqrt(2 - 2K), built from row chunks of the Gram matrix."""
+    return knn_graph_from_rows(
+        lambda start, stop: np.sqrt(np.maximum(2 - 2 * statevector_kernel(states[start:stop], states), 0)),
+        len(states), k, chunk_size
+    )
+
+
+# ------------------------------
+# Data Selection and Generation
+# ------------------------------
+DEFAULT_DATA_PARAMS = {
+    "data_type": "synthetic_clusters",  # default
+    "num_samples": 100,
+    "num_features": 4,
+    "n_points": 100,
+    "noise": 0.05,
+    "swiss_roll_n_points": 150,
+    "swiss_roll_noise": 0.1,
+    "dataset_id": None
+}
 
+def load_tda_data(params: dict):
+    """
+    Select or generate the input data named by params["data_type"].
+    Returns (data, data_type_used); raises ValueError for unknown or incomplete selections.
+    """
+    data_type = params["data_type"]
+    if data_type in ["synthetic_clusters", "1"]:
+        return generate_synthetic_clusters(num_samples=params["num_samples"], num_features=params["num_features"]), \
+            "synthetic_clusters"
+    elif data_type in ["loop", "2"]:
+        return generate_loop_data(n_points=params["n_points"], noise=params["noise"]), "loop"
+    elif data_type in ["swiss_roll", "3"]:
+        return generate_swiss_roll(n_points=params["swiss_roll_n_points"], noise=params["swiss_roll_noise"]), \
+            "swiss_roll"
+    elif data_type in ["dataset", "4"]:
+        if params.get("dataset_id", None) is None:
+            raise ValueError("dataset_id not provided")
+        try:
+            # Shared read-only memory map; nothing is parsed or copied per request.
+            return dataset_registry.load(params["dataset_id"]), "dataset"
+        except KeyError as e:
+            raise ValueError(str(e.args[0]))
+    raise ValueError(f"Invalid data_type '{data_type}' provided.")
 
 # ------------------------------
 # API Endpoint Function
 # ------------------------------
-def quantum_tda_endpoint(data_identifier=2, use_pauli=False) -> dict:
+FILTRATIONS = ("dense", "knn")
+
+def quantum_tda_endpoint(data_identifier=2, use_pauli=False, kernel_method="statevector",
+                         nystrom_landmarks=None, landmark_method="kmeans++",
+                         parallel_workers=None, tile_size=256,
+                         maxdim=None, thresh=None, n_perm=None,
+                         filtration="dense", knn_k=15,
+                         include="all", matrix_format="dense", dataset_id=None,
+                         summaries=False, summary_resolution=100, diagram_distance=None,
+                         reduction="pca", max_qubits=None) -> dict:
     """
     API endpoint function for Quantum Topological Data Analysis.
 
@@ -79,81 +496,244 @@ def quantum_tda_endpoint(data_identifier=2, use_pauli=False) -> dict:
         "synthetic_clusters", "1"
         "loop", "2"
         "swiss_roll", "3"
-        "csv", "4"
+        "dataset", "4" (a registered upload; requires dataset_id)
     - use_pauli: boolean, whether to use PauliFeatureMap instead of ZZFeatureMap
+    - kernel_method: "statevector" (exact, O(N) simulations) or "fidelity" (O(N^2) circuits)
+    - nystrom_landmarks: if set, approximate the quantum kernel from this many landmarks
+    - landmark_method: "kmeans++" or "leverage" landmark selection for the Nystrom mode
+    - parallel_workers: if greater than 1, evaluate the quantum kernel in tiles across this many
+      processes of a shared pool (at most os.cpu_count())
+    - tile_size: rows/columns per kernel tile in the parallel mode
+    - maxdim, thresh, n_perm: ripser settings; None picks defaults from the number of points
+      (see auto_persistence_settings / auto_threshold). The settings used are returned.
+    - filtration: "dense" (full distance matrices) or "knn" (sparse kNN graphs, O(N*k) memory;
+      no kernel or distance matrices are returned)
+    - knn_k: neighbours per point in the kNN filtration
+    - include: "all" (input data, matrices and diagrams), "diagrams", "summaries"
+      (persistence summaries instead of diagrams) or "kernels" (kernel and distance
+      matrices only; persistence is skipped)
+    - matrix_format: "dense", "condensed" (float32 upper triangle) or "binary" (condensed, base64)
+    - dataset_id: id returned by the dataset upload; implies data_identifier "dataset"
+    - summaries: also return Betti curves, landscapes, persistence images and entropy
+      (see persistence_summaries); summary_resolution is the number of grid points
+    - diagram_distance: compare the quantum and classical diagrams per homology dimension
+      with "bottleneck", "wasserstein", "sliced_wasserstein" or "auto" (exact metrics for
+      small diagrams, sliced Wasserstein for large ones); None skips the comparison
+    - reduction: how inputs with more features than the qubit budget are reduced before
+      quantum encoding: "pca" (randomized SVD), "variance" (highest-variance columns) or
+      "none" (refuse them); the classical kernel always uses all features
+    - max_qubits: qubit budget (default and upper bound QTDA_MAX_QUBITS)
 
-    Returns a dictionary with kernel matrices, distance matrices, and persistence diagrams.
+    Returns a dictionary with kernel matrices, distance matrices, and persistence diagrams,
+    plus per-stage timings ("stage_timings"; the quantum and classical branches run
+    concurrently). Arrays are returned as NumPy arrays; pass the result through sanitize_for_json before
+    serializing.
     """
     # Default parameters
-    params = {
-        "data_type": "synthetic_clusters",  # default
-        "num_samples": 100,
-        "num_features": 4,
-        "n_points": 100,
-        "noise": 0.05,
-        "swiss_roll_n_points": 150,
-        "swiss_roll_noise": 0.1,
-        "use_pauli": use_pauli,
-        "gamma": 0.001,
-        "csv_path": None
-    }
+    params = {**DEFAULT_DATA_PARAMS, "use_pauli": use_pauli, "gamma": 0.001, "dataset_id": dataset_id}
 
-    # If provided, override data type
-    if data_identifier is not None:
+    # If provided, override data type (a dataset id selects the registered upload)
+    if dataset_id is not None:
+        params["data_type"] = "dataset"
+    elif data_identifier is not None:
         params["data_type"] = str(data_identifier).lower()
 
+    timings = StageTimings()
+    try:
+        with timings.stage("load_data"):
+            data, data_type_used = load_tda_data(params)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    if include not in ("all", "diagrams", "summaries", "kernels"):
+        return {"error": f"Invalid include '{include}' provided."}
+    if filtration not in FILTRATIONS:
+        return {"error": f"filtration must be one of {FILTRATIONS}."}
+    if not isinstance(tile_size, int) or isinstance(tile_size, bool) or tile_size < 1:
+        return {"error": "tile_size must be a positive integer."}
+    if kernel_method not in KERNEL_METHODS:
+        return {"error": f"kernel_method must be one of {KERNEL_METHODS}."}
+    if landmark_method not in LANDMARK_METHODS:
+        return {"error": f"landmark_method must be one of {LANDMARK_METHODS}."}
+    if matrix_format not in MATRIX_FORMATS:
+        return {"error": f"matrix_format must be one of {MATRIX_FORMATS}."}
+    if diagram_distance:
+        try:
+            check_metrics(diagram_distance)
+        except ValueError as e:
+            return {"error": str(e)}
+
+    # One qubit per feature: reduce (or refuse) inputs wider than the qubit budget.
+    try:
+        with timings.stage("feature_reduction"):
+            quantum_data, reduction_report = reduce_to_qubit_budget(data, max_qubits=max_qubits, method=reduction)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    if filtration == "knn":
+        if include == "kernels":
+            return {"error": "The kNN filtration does not build dense kernel matrices."}
+        output = _knn_tda_output(data, quantum_data, data_type_used, params, kernel_method, nystrom_landmarks,
+                                 landmark_method, int(knn_k), maxdim, thresh, include, timings)
+        output["feature_reduction"] = reduction_report
+        return _finish_persistence_output(output, include, summaries, summary_resolution, diagram_distance, timings)
+
     # ------------------------------
-    # Data Selection and Generation
+    # Stage Graph
     # ------------------------------
-    data_type = params["data_type"]
-    if data_type in ["synthetic_clusters", "1"]:
-        data = generate_synthetic_clusters(num_samples=params["num_samples"], num_features=params["num_features"])
-        data_type_used = "synthetic_clusters"
-    elif data_type in ["loop", "2"]:
-        data = generate_loop_data(n_points=params["n_points"], noise=params["noise"])
-        data_type_used = "loop"
-    elif data_type in ["swiss_roll", "3"]:
-        data = generate_swiss_roll(n_points=params["swiss_roll_n_points"], noise=params["swiss_roll_noise"])
-        data_type_used = "swiss_roll"
-    elif data_type in ["csv", "4"]:
-        if params.get("csv_path", None) is None:
-            return {"error": "csv_path not provided"}
-        df = pd.read_csv(params["csv_path"])
-        data = df.values
-        data_type_used = "csv"
-    else:
-        return {"error": f"Invalid data_type '{data_type}' provided."}
+    # The quantum and classical branches (kernel -> persistence) are independent and run
+    # concurrently. Kernels and their distance matrices are cached on disk by data and
+    # kernel configuration.
+    def quantum_kernel_stage():
+        if nystrom_landmarks:
+            factors, nystrom_diagnostics = nystrom_quantum_kernel(
+                quantum_data, int(nystrom_landmarks), use_pauli=params["use_pauli"],
+                method=kernel_method, landmark_method=landmark_method
+            )
+            # Distances come straight from the factors; the dense N x N kernel is only
+            # formed when the kernel matrices are part of the output.
+            q_kernel = factors @ factors.T if include in ("all", "kernels") else None
+            return q_kernel, factors_to_distance(factors), False, nystrom_diagnostics
+        q_kernel, q_dist, q_hit = kernel_cache.get_or_compute(
+            quantum_data,
+            {**feature_map_config(params["use_pauli"]), "method": kernel_method},
+            lambda x: compute_quantum_kernel_matrix_parallel(x, use_pauli=params["use_pauli"], method=kernel_method,
+                                                             tile_size=tile_size, num_workers=int(parallel_workers))
+            if parallel_workers and int(parallel_workers) > 1 else
+            compute_quantum_kernel_matrix(x, use_pauli=params["use_pauli"], method=kernel_method),
+            kernel_to_distance
+        )
+        return q_kernel, q_dist, q_hit, None
+
+    def classical_kernel_stage():
+        return (*kernel_cache.get_or_compute(
+            data,
+            {"type": "rbf", "gamma": params["gamma"]},
+            lambda x: rbf_kernel(x, gamma=params["gamma"]),
+            kernel_to_distance
+        ), None)
+
+    settings = auto_persistence_settings(len(data), maxdim=maxdim, n_perm=n_perm)
+
+    def persistence_stage(kernel_result):
+        distance = kernel_result[1]
+        stage_thresh = auto_threshold(distance, thresh)
+        diagrams, info = compute_persistence(distance, thresh=stage_thresh, return_info=True, **settings)
+        return diagrams, {"thresh": None if np.isinf(stage_thresh) else stage_thresh, **info}
+
+    graph = StageGraph()
+    graph.add("quantum_kernel", quantum_kernel_stage)
+    graph.add("classical_kernel", classical_kernel_stage)
+    if include != "kernels":
+        graph.add("quantum_persistence", persistence_stage, depends_on=["quantum_kernel"])
+        graph.add("classical_persistence", persistence_stage, depends_on=["classical_kernel"])
+    results = graph.run(timings)
+    q_kernel, q_dist, q_hit, nystrom_diagnostics = results["quantum_kernel"]
+    c_kernel, c_dist, c_hit, _ = results["classical_kernel"]
 
     # ------------------------------
-    # Kernel Computations
+    # Assemble output into a JSON–friendly dictionary.
     # ------------------------------
-    # Quantum Kernel
-    q_kernel = compute_quantum_kernel_matrix(data, use_pauli=params["use_pauli"])
-    # Classical Kernel (RBF)
-    c_kernel = rbf_kernel(data, gamma=params["gamma"])
+    output = {
+        "data_type": data_type_used,
+        "kernel_cache": {"quantum": "hit" if q_hit else "miss", "classical": "hit" if c_hit else "miss"},
+        "feature_reduction": reduction_report
+    }
+    if include == "all":
+        output["input_data"] = data
+    if include in ("all", "kernels"):
+        output.update({
+            "quantum_kernel_matrix": encode_matrix(q_kernel, matrix_format),
+            "classical_kernel_matrix": encode_matrix(c_kernel, matrix_format),
+            "quantum_distance_matrix": encode_matrix(q_dist, matrix_format, include_diagonal=False),
+            "classical_distance_matrix": encode_matrix(c_dist, matrix_format, include_diagonal=False)
+        })
+    if nystrom_diagnostics is not None:
+        output["nystrom"] = nystrom_diagnostics
+    if include == "kernels":
+        output["stage_timings"] = timings.as_dict()
+        return output
 
     # ------------------------------
-    # Distance Matrices and Persistence Diagrams
+    # Persistence Diagrams
     # ------------------------------
-    q_dist = kernel_to_distance(q_kernel)
-    c_dist = kernel_to_distance(c_kernel)
+    q_persistence, q_info = results["quantum_persistence"]
+    c_persistence, c_info = results["classical_persistence"]
+    output.update({
+        "quantum_persistence_diagrams": q_persistence,
+        "classical_persistence_diagrams": c_persistence,
+        "persistence_settings": {**settings, "quantum": q_info, "classical": c_info}
+    })
+    return _finish_persistence_output(output, include, summaries, summary_resolution, diagram_distance, timings)
 
-    q_persistence = compute_persistence(q_dist)
-    c_persistence = compute_persistence(c_dist)
+def _finish_persistence_output(output, include, summaries, resolution, diagram_distance, timings) -> dict:
+    """
+    Attach quantum-vs-classical diagram distances, persistence summaries and the stage
+    timings; with include="summaries" the summaries replace the diagrams. Both summary sets
+    share one value range.
+    """
+    if diagram_distance:
+        with timings.stage("diagram_distances"):
+            output["diagram_distances"] = compare_diagram_sets(output["quantum_persistence_diagrams"],
+                                                               output["classical_persistence_diagrams"],
+                                                               metrics=diagram_distance)
+    if summaries or include == "summaries":
+        with timings.stage("summaries"):
+            # One grid for both sets, so quantum and classical summaries compare point by point.
+            value_range = diagram_range(output["quantum_persistence_diagrams"],
+                                        output["classical_persistence_diagrams"])
+            for name in ("quantum", "classical"):
+                output[f"{name}_persistence_summaries"] = summarize_diagrams(output[f"{name}_persistence_diagrams"],
+                                                                             resolution=int(resolution),
+                                                                             value_range=value_range)
+                if include == "summaries":
+                    del output[f"{name}_persistence_diagrams"]
+    output["stage_timings"] = timings.as_dict()
+    return output
+
+def _knn_tda_output(data, quantum_data, data_type_used, params, kernel_method, nystrom_landmarks, landmark_method,
+                    k, maxdim, thresh, include, timings) -> dict:
+    """Sparse-filtration variant of quantum_tda_endpoint: persistence on kNN graphs only."""
+    def quantum_graph_stage():
+        if nystrom_landmarks:
+            factors, nystrom_diagnostics = nystrom_quantum_kernel(
+                quantum_data, int(nystrom_landmarks), use_pauli=params["use_pauli"],
+                method=kernel_method, landmark_method=landmark_method
+            )
+            return euclidean_knn_graph(factors, k), nystrom_diagnostics
+        if kernel_method == "statevector":
+            states = feature_map_statevectors(feature_map_template(quantum_data.shape[1], use_pauli=params["use_pauli"]),
+                                              quantum_data)
+            return quantum_knn_graph(states, k), None
+        q_dist = kernel_to_distance(compute_quantum_kernel_matrix(quantum_data, use_pauli=params["use_pauli"], method=kernel_method))
+        return knn_graph_from_rows(lambda start, stop: q_dist[start:stop], len(data), k), None
+
+    settings = auto_persistence_settings(len(data), maxdim=maxdim, n_perm=None)
+    settings["n_perm"] = None  # greedy permutations need a dense matrix
+    thresh = np.inf if thresh is None else float(thresh)
+
+    graph = StageGraph()
+    graph.add("quantum_knn_graph", quantum_graph_stage)
+    graph.add("classical_knn_graph", lambda: (rbf_knn_graph(data, k, params["gamma"]), None))
+    graph.add("quantum_persistence", lambda result: compute_persistence(result[0], thresh=thresh, **settings),
+              depends_on=["quantum_knn_graph"])
+    graph.add("classical_persistence", lambda result: compute_persistence(result[0], thresh=thresh, **settings),
+              depends_on=["classical_knn_graph"])
+    results = graph.run(timings)
+    q_graph, nystrom_diagnostics = results["quantum_knn_graph"]
+    c_graph, _ = results["classical_knn_graph"]
 
-    # ------------------------------
-    # Assemble output into a JSON–friendly dictionary.
-    # ------------------------------
     output = {
         "data_type": data_type_used,
-        "input_data": data.tolist(),
-        "quantum_kernel_matrix": q_kernel.tolist(),
-        "classical_kernel_matrix": c_kernel.tolist(),
-        "quantum_distance_matrix": q_dist.tolist(),
-        "classical_distance_matrix": c_dist.tolist(),
-        "quantum_persistence_diagrams": [dgm.tolist() for dgm in q_persistence],
-        "classical_persistence_diagrams": [dgm.tolist() for dgm in c_persistence]
+        "quantum_persistence_diagrams": results["quantum_persistence"],
+        "classical_persistence_diagrams": results["classical_persistence"],
+        "persistence_settings": {**settings, "thresh": None if np.isinf(thresh) else thresh},
+        "knn_graph": {"k": k, "quantum_edges": int(q_graph.nnz // 2), "classical_edges": int(c_graph.nnz // 2)}
     }
+    if include == "all":
+        output["input_data"] = data
+    if nystrom_diagnostics is not None:
+        output["nystrom"] = nystrom_diagnostics
     return output
 
 # ------------------------------
@@ -163,4 +743,4 @@ if __name__ == "__main__":
     import json
     # Run with swiss roll and use Pauli map
     result_json = quantum_tda_endpoint(data_identifier="2", use_pauli=True)
-    print(json.dumps(result_json, indent=2))
+    print(json.dumps(sanitize_for_json(result_json), indent=2))
@@ -0,0 +1,82 @@
+"""
+JSON serialization helpers shared by the API endpoints.
+
+NumPy arrays are sanitized in one vectorized pass (NaN -> 0, +/-Inf -> 10000) instead of
+walking every element, and square matrices can be sent in condensed upper-triangle
+float32 form, optionally as base64-encoded little-endian bytes.
+"""
+
+import base64
+
+import numpy as np
+
+NAN_REPLACEMENT = 0
+INF_REPLACEMENT = 10000
+MATRIX_FORMATS = ("dense", "condensed", "binary")
+
+
+def sanitize_array(array) -> np.ndarray:
+    """Replace NaN/Inf in a numeric array with JSON-safe values in one pass."""
+    array = np.asarray(array)
+    if array.dtype.kind != "f":
+        return array
+    return np.nan_to_num(array, nan=NAN_REPLACEMENT, posinf=INF_REPLACEMENT, neginf=INF_REPLACEMENT)
+
+
+def sanitize_for_json(obj):
+    """Recursively replace inf, -inf, nan in a structure with safe JSON values."""
+    if isinstance(obj, np.ndarray):
+        return sanitize_array(obj).tolist()
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float):
+        if np.isnan(obj):
+            return NAN_REPLACEMENT
+        if np.isinf(obj):
+            return INF_REPLACEMENT
+        return obj
+    elif isinstance(obj, (list, tuple)):
+        return [sanitize_for_json(item) for item in obj]
+    elif isinstance(obj, dict):
+        return {k: sanitize_for_json(v) for k, v in obj.items()}
+    else:
+        return obj
+
+
+def condensed_upper(matrix, include_diagonal: bool = True) -> np.ndarray:
+    """Row-major upper triangle of a square matrix as float32, built row by row to avoid index arrays."""
+    n = matrix.shape[0]
+    offset = 0 if include_diagonal else 1
+    values = np.empty((n * (n + 1)) // 2 if include_diagonal else (n * (n - 1)) // 2, dtype=np.float32)
+    position = 0
+    for i in range(n):
+        row = matrix[i, i + offset:]
+        values[position:position + len(row)] = row
+        position += len(row)
+    return values
+
+
+def encode_matrix(matrix, matrix_format: str = "dense", include_diagonal: bool = True):
+    """
+    Encode a square (symmetric) matrix for a response.
+
+    - "dense": the full matrix (nested lists once sanitized)
+    - "condensed": {"format", "n", "include_diagonal", "dtype", "values"} with the float32 upper triangle
+    - "binary": as "condensed", with 'values' base64-encoded little-endian float32 bytes
+    """
+    if matrix_format == "dense":
+        return np.asarray(matrix)
+    if matrix_format not in MATRIX_FORMATS:
+        raise ValueError(f"matrix_format must be one of {MATRIX_FORMATS}.")
+    values = sanitize_array(condensed_upper(matrix, include_diagonal))
+    encoded = {
+        "format": "condensed_upper",
+        "n": int(matrix.shape[0]),
+        "include_diagonal": include_diagonal,
+        "dtype": "float32",
+        "values": values
+    }
+    if matrix_format == "binary":
+        encoded["encoding"] = "base64"
+        encoded["values"] = base64.b64encode(values.astype("<f4").tobytes()).decode("ascii")
+    return encoded
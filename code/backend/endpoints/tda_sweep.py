@@ -0,0 +1,122 @@
+"""
+Kernel Hyperparameter Sweep
+
+Evaluates a grid of quantum feature-map configurations (map type x reps x entanglement)
+and RBF gammas on one dataset in a single job and returns a table of persistence
+summaries per configuration.
+
+Shared work is done once: the data is loaded once, each feature-map configuration's
+statevectors are simulated once (its kernel also goes through the on-disk kernel cache
+under the same key as /api/quantum_tda), and every RBF kernel is an elementwise
+exp(-gamma * S) of one pairwise squared-distance matrix S.
+"""
+
+import itertools
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from sklearn.metrics.pairwise import euclidean_distances
+
+from endpoints.feature_reduction import reduce_to_qubit_budget
+from endpoints.kernel_cache import kernel_cache
+from endpoints.persistence_summaries import diagram_range, diagram_summary, summarize_diagrams
+from endpoints.quantum_TDA import (DEFAULT_DATA_PARAMS, auto_persistence_settings, auto_threshold,
+                                   compute_persistence, feature_map_statevectors, kernel_to_distance,
+                                   load_tda_data, statevector_kernel, template_from_config)
+
+FEATURE_MAP_TYPES = ("zz", "pauli")
+ENTANGLEMENTS = ("full", "linear", "reverse_linear", "circular", "sca", "pairwise")
+MAX_CONFIGURATIONS = 64
+
+
+def _persistence_row(distance: np.ndarray, maxdim):
+    """Persistence diagrams of one configuration and its per-dimension summary row."""
+    settings = auto_persistence_settings(len(distance), maxdim=maxdim)
+    diagrams = compute_persistence(distance, thresh=auto_threshold(distance), **settings)
+    return diagrams, {"summary": diagram_summary(diagrams)}
+
+# ------------------------------
+# API Endpoint Function
+# ------------------------------
+def tda_sweep_endpoint(data_identifier=2, dataset_id=None, map_types=("zz",), reps=(1, 2, 3),
+                       entanglements=("full",), gammas=(0.001, 0.01, 0.1, 1.0), maxdim=None,
+                       vectorized_summaries=False, summary_resolution=100, reduction="pca",
+                       max_qubits=None) -> Dict[str, Any]:
+    """
+    Hyperparameter sweep over quantum feature maps and RBF gammas.
+
+    Parameters:
+    - data_identifier / dataset_id: input data, as for quantum_tda_endpoint
+    - map_types: feature-map types ("zz", "pauli")
+    - reps: feature-map repetitions
+    - entanglements: entanglement patterns ("full", "linear", "circular", ...)
+    - gammas: RBF kernel widths
+    - maxdim: highest homology dimension (None picks it from the number of points)
+    - vectorized_summaries: also return Betti curves, landscapes, images and entropy per row,
+      all on one grid spanning every row's diagrams
+    - reduction, max_qubits: feature reduction before quantum encoding, as for quantum_tda_endpoint
+
+    Returns one row per configuration with its parameters, persistence summary per homology
+    dimension and the time spent on it.
+    """
+    params = {**DEFAULT_DATA_PARAMS, "dataset_id": dataset_id}
+    if dataset_id is not None:
+        params["data_type"] = "dataset"
+    elif data_identifier is not None:
+        params["data_type"] = str(data_identifier).lower()
+    try:
+        data, data_type_used = load_tda_data(params)
+        quantum_data, reduction_report = reduce_to_qubit_budget(data, max_qubits=max_qubits, method=reduction)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    if any(t not in FEATURE_MAP_TYPES for t in map_types):
+        return {"error": f"map_types must be drawn from {FEATURE_MAP_TYPES}."}
+    if any(e not in ENTANGLEMENTS for e in entanglements):
+        return {"error": f"entanglements must be drawn from {ENTANGLEMENTS}."}
+    feature_maps = [{"type": t, "reps": int(r), "entanglement": e}
+                    for t, r, e in itertools.product(map_types, reps, entanglements)]
+    if len(feature_maps) + len(gammas) > MAX_CONFIGURATIONS:
+        return {"error": f"The sweep is limited to {MAX_CONFIGURATIONS} configurations."}
+
+    rows: List[Dict[str, Any]] = []
+    row_diagrams = []
+    for config in feature_maps:
+        start = time.perf_counter()
+        _, distance, hit = kernel_cache.get_or_compute(
+            quantum_data,
+            {**config, "method": "statevector"},
+            lambda x: statevector_kernel(feature_map_statevectors(template_from_config(x.shape[1], config), x)),
+            kernel_to_distance
+        )
+        row = {"kernel": "quantum", **config, "kernel_cache": "hit" if hit else "miss"}
+        diagrams, summary = _persistence_row(distance, maxdim)
+        row.update(summary)
+        row_diagrams.append(diagrams)
+        row["seconds"] = time.perf_counter() - start
+        rows.append(row)
+
+    squared = euclidean_distances(data, squared=True)
+    for gamma in gammas:
+        start = time.perf_counter()
+        kernel = np.exp(-float(gamma) * squared)
+        # The RBF diagonal is 1, so d(i,j) = sqrt(2 - 2 K(i,j)).
+        distance = np.sqrt(np.abs(2.0 - 2.0 * kernel))
+        row = {"kernel": "rbf", "gamma": float(gamma)}
+        diagrams, summary = _persistence_row(distance, maxdim)
+        row.update(summary)
+        row_diagrams.append(diagrams)
+        row["seconds"] = time.perf_counter() - start
+        rows.append(row)
+
+    # One value range over every row, so the vectorized summaries compare point by point.
+    if vectorized_summaries:
+        value_range = diagram_range(*row_diagrams)
+        for row, diagrams in zip(rows, row_diagrams):
+            start = time.perf_counter()
+            row["summaries"] = summarize_diagrams(diagrams, resolution=int(summary_resolution), value_range=value_range)
+            row["seconds"] += time.perf_counter() - start
+
+    return {"data_type": data_type_used, "num_points": int(len(data)), "feature_reduction": reduction_report,
+            "results": rows}
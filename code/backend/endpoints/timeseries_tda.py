@@ -0,0 +1,144 @@
+"""
+Rolling-Window Time-Series TDA
+
+Embeds a price series with a sliding-window (Takens delay) embedding of its standardized
+log-returns and computes persistence for every rolling window of embedded points.
+
+Consecutive windows share all but 'stride' points, so windows are streamed through one
+sliding-window incremental kernel (see incremental_kernel): each step simulates only the
+new points' statevectors and computes their kernel rows against the window, and the
+blocks of the overlapping points are reused. With 'num_workers' the window sequence is
+split into contiguous ranges that are streamed in parallel processes.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+from endpoints.calibration import calibration_cache
+from endpoints.feature_reduction import check_qubit_budget
+from endpoints.incremental_kernel import _IncrementalDataset
+from endpoints.persistence_summaries import diagram_summary
+from endpoints.quantum_TDA import compute_persistence, feature_map_config
+
+
+def takens_embedding(series: np.ndarray, dimension: int = 3, delay: int = 1) -> np.ndarray:
+    """Delay vectors (x_t, x_{t+delay}, ..., x_{t+(dimension-1)*delay}) as a zero-copy view."""
+    span = (dimension - 1) * delay + 1
+    if len(series) < span:
+        return np.empty((0, dimension))
+    return np.lib.stride_tricks.sliding_window_view(series, span)[:, ::delay]
+
+
+def standardized_log_returns(prices) -> np.ndarray:
+    log_returns = np.diff(np.log(np.asarray(prices, dtype=float)))
+    std = log_returns.std()
+    return (log_returns - log_returns.mean()) / (std if std > 0 else 1.0)
+
+
+def rolling_window_persistence(points: np.ndarray, window: int, stride: int = 1, use_pauli: bool = False,
+                               gamma: float = 0.001, maxdim: int = 1, first_window: int = 0,
+                               num_windows: int = None, include_diagrams: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Stream persistence results for windows 'first_window', 'first_window + 1', ... where
+    window w covers embedded points [w * stride, w * stride + window).
+    """
+    total_windows = (len(points) - window) // stride + 1
+    last_window = total_windows if num_windows is None else min(total_windows, first_window + num_windows)
+    dataset = _IncrementalDataset(points.shape[1], use_pauli, gamma, max_rows=window)
+    filled_to = first_window * stride
+    for w in range(first_window, last_window):
+        start = w * stride
+        # Only the points not already in the ring are appended (at most 'window' of them).
+        dataset.append(points[max(filled_to, start):start + window])
+        filled_to = start + window
+
+        matrices = dataset.matrices()
+        result = {"window": w, "start": int(start), "stop": int(start + window)}
+        for name, key in (("quantum", "quantum_distance_matrix"), ("classical", "classical_distance_matrix")):
+            diagrams = compute_persistence(matrices[key], maxdim=maxdim)
+            result[name] = diagram_summary(diagrams)
+            if include_diagrams:
+                result[name + "_persistence_diagrams"] = [dgm.tolist() for dgm in diagrams]
+        yield result
+
+
+def _window_range(args) -> List[Dict[str, Any]]:
+    points, first_window, num_windows, options = args
+    threadpool_limits(1)
+    return list(rolling_window_persistence(points, first_window=first_window, num_windows=num_windows, **options))
+
+# ------------------------------
+# API Endpoint Function
+# ------------------------------
+def timeseries_tda_endpoint(prices=None, pair=None, window=60, stride=5, embedding_dimension=3, delay=1,
+                            use_pauli=False, gamma=0.001, maxdim=1, num_workers=None,
+                            include_diagrams=False) -> Dict[str, Any]:
+    """
+    Rolling-window persistence of a price series.
+
+    Parameters:
+    - prices: list of prices, or
+    - pair: a pair with price history in the calibration cache (e.g. "ETH-USDC")
+    - window: embedded points per window; stride: points between consecutive windows
+    - embedding_dimension, delay: Takens embedding of the standardized log-returns
+      (one qubit per embedding dimension)
+    - maxdim: highest homology dimension
+    - num_workers: if greater than 1, stream contiguous ranges of windows in parallel processes
+    - include_diagrams: also return the full diagrams of every window
+
+    Returns per-window persistence summaries (feature counts, total and maximum persistence,
+    persistent entropy) for the quantum and RBF kernel distances.
+    """
+    if prices is None:
+        if pair is None:
+            return {"error": "prices or pair must be provided"}
+        try:
+            prices = calibration_cache.prices(pair)
+        except KeyError as e:
+            return {"error": str(e.args[0])}
+    window, stride = int(window), int(stride)
+    embedding_dimension, delay = int(embedding_dimension), int(delay)
+    if window < 2 or stride < 1:
+        return {"error": "window must be at least 2 and stride at least 1."}
+    if embedding_dimension < 2 or delay < 1:
+        return {"error": "embedding_dimension must be at least 2 and delay at least 1."}
+    try:
+        check_qubit_budget(embedding_dimension)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    points = takens_embedding(standardized_log_returns(prices), embedding_dimension, delay)
+    if len(points) < window:
+        return {"error": f"The series yields {len(points)} embedded points, fewer than the window of {window}."}
+    total_windows = (len(points) - window) // stride + 1
+
+    options = {"window": window, "stride": stride, "use_pauli": use_pauli, "gamma": gamma,
+               "maxdim": int(maxdim), "include_diagrams": include_diagrams}
+    if num_workers is not None and int(num_workers) > 1 and total_windows > 1:
+        num_workers = min(int(num_workers), total_windows)
+        bounds = np.linspace(0, total_windows, num_workers + 1).astype(int)
+        # Each range needs only its own points; window indices are rebased per range.
+        tasks = [(np.ascontiguousarray(points[first * stride:(last - 1) * stride + window]), 0, last - first, options)
+                 for first, last in zip(bounds[:-1], bounds[1:])]
+        windows = []
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for first, results in zip(bounds[:-1], pool.map(_window_range, tasks)):
+                for result in results:
+                    result.update(window=result["window"] + int(first), start=result["start"] + int(first) * stride,
+                                  stop=result["stop"] + int(first) * stride)
+                windows.extend(results)
+    else:
+        windows = list(rolling_window_persistence(points, **options))
+
+    return {
+        "embedding": {"dimension": embedding_dimension, "delay": delay, "num_points": int(len(points))},
+        "feature_map": feature_map_config(use_pauli),
+        "window": window,
+        "stride": stride,
+        "num_windows": int(total_windows),
+        "windows": windows
+    }
@@ -1,132 +1,94 @@
 """
 Quantum Order Routing Optimizer
 
-This module provides quantum annealing optimization for order routing
-across different venues with varying fees and slippage characteristics.
+This module optimizes order routing across different venues with varying
+fees and slippage characteristics, either exactly (the default) or with a
+pluggable CQM solver backend (quantum_tools/solver_backends.py).
 """
 
 import numpy as np
 import json
 import os
+import time
 from typing import Dict, List, Any, Tuple, Optional
 
-from dimod import ConstrainedQuadraticModel, Binary
-from dwave.system import LeapHybridCQMSampler
-
+from quantum_tools.routing_model import (build_routing_cqm, optimality_gap, routing_cost, routing_quantities,
+                                          solve_routing_exact)
+from quantum_tools.solver_backends import get_backend
 from wormhole_wrapper import wormhole_client
 
-def optimize_order_routing(total_shares: int) -> Dict[str, Any]:
+ROUTING_SOLVERS = ("exact", "cqm")
+
+def optimize_order_routing(total_shares: int, solver: str = "exact", backend: Optional[str] = None,
+                           time_limit: Optional[float] = None, num_reads: Optional[int] = None) -> Dict[str, Any]:
     """
-    Optimize order routing across available venues using quantum annealing
+    Optimize order routing across available venues
     
     Args:
         total_shares: Total number of shares/tokens to trade
+        solver: "exact" for the exact classical solver of the chunked model, or "cqm" to sample
+            the CQM with a solver backend, reported with its gap to the exact optimum
+        backend: solver backend for solver="cqm" ("dwave", "anneal", "tabu"; default from
+            QUANTUM_SOLVER_BACKEND)
+        time_limit, num_reads: the backend's time (seconds) and read budgets
         
     Returns:
         Dictionary with optimization results
     """
+    if solver not in ROUTING_SOLVERS:
+        return {"error": f"solver must be one of {ROUTING_SOLVERS}."}
+    try:
+        sampler = get_backend(backend, time_limit, num_reads)
+    except ValueError as e:
+        return {"error": str(e)}
+    
     # Fetch venues from Wormhole SDK
     venues = wormhole_client.get_venues()
     
-    # Create model
-    cqm = ConstrainedQuadraticModel()
-    x = {}  # Binary variables indexed by venue and quantity
-    
-    # Define binary variables for each venue and unit of shares (in chunks)
+    # Quantities are chosen in chunks, and no venue can take more than the total
     chunk_size = max(1, total_shares // 100)  # Adaptive chunk size
-    if chunk_size < 1:
-        chunk_size = 1  # Ensure minimum chunk size of 1
-        
-    for i, venue in enumerate(venues):
-        max_shares = min(venue["max"], total_shares)  # Can't route more than total
-        for q in range(0, max_shares + 1, chunk_size):
-            var = Binary(f"x_{i}_{q}")
-            x[(i, q)] = var
-            
-            # Cost = (fee + slippage) * quantity
-            cost = (venue["fee"] + venue["slippage"]) * q
-            cqm.set_objective(cqm.objective + cost * var)
+    start = time.perf_counter()
+    quantities = solve_routing_exact(venues, total_shares, chunk_size, limit=total_shares)
+    result = {"solver": "exact", "solve_seconds": time.perf_counter() - start}
+    if quantities is None:
+        return {"error": f"{total_shares} shares cannot be routed in chunks of {chunk_size} "
+                         "within the venues' capacity."}
     
-    # Constraint: total number of shares must equal total_shares
-    cqm.add_constraint(
-        sum(q * x[(i, q)] for (i, q) in x) == total_shares,
-        label="total_shares"
-    )
+    # Optionally sample the CQM with the solver backend and compare with the exact optimum.
+    # As in route_order_optimally, no feasible sample is an error rather than a silent fallback.
+    if solver == "cqm":
+        model = build_routing_cqm(venues, total_shares, chunk_size, limit=total_shares)
+        start = time.perf_counter()
+        sampleset = sampler.sample_cqm(model["cqm"], label="Order Routing QUBO")
+        feasible = sampleset.filter(lambda d: d.is_feasible)
+        feasibility_rate = len(feasible) / max(len(sampleset), 1)
+        if len(feasible) == 0:
+            return {"error": "The CQM solver returned no feasible routing.", "feasibility_rate": feasibility_rate}
+        cqm_quantities = routing_quantities(model["grid"], feasible.first.sample)
+        result = {
+            "solver": "cqm",
+            **sampler.info(),
+            "model_build_seconds": model["build_seconds"],
+            "solve_seconds": time.perf_counter() - start,
+            "feasibility_rate": feasibility_rate,
+            "optimality_gap": optimality_gap(venues, cqm_quantities, quantities)
+        }
+        quantities = cqm_quantities
     
-    # Constraint: one quantity per venue
-    for i, venue in enumerate(venues):
-        max_shares = min(venue["max"], total_shares)
-        cqm.add_constraint(
-            sum(x[(i, q)] for q in range(0, max_shares + 1, chunk_size)) <= 1,
-            label=f"one_choice_venue_{i}"
-        )
-    
-    # Check if we need to use the DWave solver or a classical solver
-    try:
-        # Use D-Wave hybrid solver if API key is available
-        dwave_api_key = os.getenv("DWAVE_API_KEY")
-        if dwave_api_key:
-            sampler = LeapHybridCQMSampler()
-            result = sampler.sample_cqm(cqm, label="Order Routing QUBO")
-            solution = result.first.sample
-        else:
-            # Fallback to classical approximation if no API key
-            print("No DWave API key found, using classical approximation")
-            solution = _classical_approximation(venues, total_shares)
-    except Exception as e:
-        print(f"Error using quantum solver: {e}")
-        solution = _classical_approximation(venues, total_shares)
-    
-    # Extract and format results
-    venue_allocation = []
-    for (i, q), var in x.items():
-        var_name = var.name if hasattr(var, 'name') else f"x_{i}_{q}"
-        if var_name in solution and solution[var_name] == 1:
-            venue_name = venues[i]["name"]
-            venue_allocation.append({
-                "venue": venue_name,
-                "amount": q,
-                "fee": venues[i]["fee"] * q,
-                "slippage": venues[i]["slippage"] * q
-            })
-    
-    # Calculate total cost
-    total_cost = sum(
-        alloc["fee"] + alloc["slippage"]
-        for alloc in venue_allocation
-    )
+    # Format results
+    venue_allocation = [
+        {
+            "venue": venues[i]["name"],
+            "amount": q,
+            "fee": venues[i]["fee"] * q,
+            "slippage": venues[i]["slippage"] * q
+        }
+        for i, q in enumerate(quantities.tolist()) if q > 0
+    ]
     
     return {
         "total_shares": total_shares,
         "venue_allocation": venue_allocation,
-        "total_cost": total_cost
+        "total_cost": routing_cost(venues, quantities),
+        **result
     }
-
-def _classical_approximation(venues: List[Dict[str, Any]], total_shares: int) -> Dict[str, int]:
-    """
-    Simple classical approximation for order routing when quantum solver is unavailable
-    
-    Args:
-        venues: List of venue data
-        total_shares: Total number of shares to allocate
-        
-    Returns:
-        Dictionary mapping variable names to values
-    """
-    # Sort venues by total cost (fee + slippage)
-    sorted_venues = sorted(venues, key=lambda v: v["fee"] + v["slippage"])
-    
-    solution = {}
-    remaining_shares = total_shares
-    
-    # Allocate to cheapest venues first
-    for i, venue in enumerate(sorted_venues):
-        max_shares = min(venue["max"], remaining_shares)
-        if max_shares > 0:
-            solution[f"x_{i}_{max_shares}"] = 1
-            remaining_shares -= max_shares
-        
-        if remaining_shares <= 0:
-            break
-    
-    return solution
\ No newline at end of file
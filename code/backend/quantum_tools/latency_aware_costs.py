@@ -1,7 +1,8 @@
 import numpy as np
 import requests
 import dimod
-from dwave.system import DWaveSampler, EmbeddingComposite
+
+from quantum_tools.solver_backends import get_backend
 
 def fetch_live_venue_data(token_pair=("USDC", "ETH")):
     """
@@ -31,19 +32,27 @@ def fetch_live_venue_data(token_pair=("USDC", "ETH")):
 
     return venues
 
-def select_optimal_venue(order_volume=100_000, time_remaining=5, use_live_data=False, token_pair=("USDC", "ETH")):
+def select_optimal_venue(order_volume=100_000, time_remaining=5, use_live_data=False, token_pair=("USDC", "ETH"),
+                         backend=None, time_limit=None, num_reads=None):
     """
-    Selects the best trading venue using a QUBO and D-Wave sampler.
+    Selects the best trading venue using a QUBO and a solver backend.
 
     Parameters:
         order_volume (int): Number of shares/tokens to route.
         time_remaining (int): Time left in minutes (0 = urgent).
         use_live_data (bool): Whether to use live venue data from WormholeScan.
         token_pair (tuple): Token pair to trade (from_token, to_token).
+        backend (str): Solver backend ("dwave", "anneal", "tabu"; default from QUANTUM_SOLVER_BACKEND).
+        time_limit (float), num_reads (int): The backend's time (seconds) and read budgets.
 
     Returns:
         dict: Details of the selected venue and cost breakdown.
     """
+    try:
+        sampler = get_backend(backend, time_limit, num_reads)
+    except ValueError as e:
+        return {"error": str(e)}
+
     if use_live_data:
         live_venues = fetch_live_venue_data(token_pair)
         if not live_venues:
@@ -77,14 +86,14 @@ def select_optimal_venue(order_volume=100_000, time_remaining=5, use_live_data=F
                 )
                 if order_volume > vi["max_volume"]:
                     base_cost += 0.01  # Penalty for exceeding volume
-                Q[(name_i, name_j)] = base_cost
+                # penalty * (sum x - 1)^2 expands to -penalty on the diagonal and 2 * penalty per pair
+                Q[(name_i, name_j)] = base_cost - penalty
             else:
                 Q[(name_i, name_j)] = penalty  # Enforce one-hot
 
     bqm = dimod.BinaryQuadraticModel.from_qubo(Q)
 
-    sampler = EmbeddingComposite(DWaveSampler())
-    sampleset = sampler.sample(bqm, num_reads=100)
+    sampleset = sampler.sample_bqm(bqm)
     best = sampleset.first.sample
 
     selected_venue = [v for v in venues if best.get(v) == 1]
@@ -1,6 +1,9 @@
+import time
+
 import requests
-from dwave.system import LeapHybridCQMSampler
-from dimod import ConstrainedQuadraticModel, Binary
+
+from quantum_tools.routing_model import build_routing_cqm, optimality_gap, routing_quantities, solve_routing_exact
+from quantum_tools.solver_backends import get_backend
 
 def fetch_venue_data_wormhole(token_pair=("USDC", "ETH"), chunk_size=100):
     """
@@ -40,42 +43,56 @@ def fetch_venue_data_wormhole(token_pair=("USDC", "ETH"), chunk_size=100):
     return venues
 
 
-def route_order_optimally(total_shares=1000, chunk_size=100):
+ROUTING_SOLVERS = ("exact", "cqm")
+
+
+def route_order_optimally(total_shares=1000, chunk_size=100, solver="exact", backend=None, time_limit=None,
+                          num_reads=None):
     """
     Optimize routing of a token swap using live Wormhole-connected venues.
+
+    solver="exact" solves the chunked model exactly on the CPU; solver="cqm" samples it with
+    the solver backend 'backend' (see quantum_tools/solver_backends.py) within 'time_limit'
+    seconds and 'num_reads' reads, and reports the gap to the exact optimum.
     """
+    if solver not in ROUTING_SOLVERS:
+        return {"error": f"solver must be one of {ROUTING_SOLVERS}."}
+    try:
+        sampler = get_backend(backend, time_limit, num_reads)
+    except ValueError as e:
+        return {"error": str(e)}
     venues = fetch_venue_data_wormhole()
 
-    cqm = ConstrainedQuadraticModel()
-    x = {}
-
-    for i, venue in enumerate(venues):
-        for q in range(0, venue["max"] + 1, chunk_size):
-            var = Binary(f"x_{i}_{q}")
-            x[(i, q)] = var
-            cost = (venue["fee"] + venue["slippage"]) * q
-            cqm.set_objective(cqm.objective + cost * var)
-
-    cqm.add_constraint(
-        sum(q * x[(i, q)] for (i, q) in x) == total_shares,
-        label="total_shares"
-    )
-
-    for i, venue in enumerate(venues):
-        cqm.add_constraint(
-            sum(x[(i, q)] for q in range(0, venue["max"] + 1, chunk_size)) <= 1,
-            label=f"one_choice_venue_{i}"
-        )
-
-    sampler = LeapHybridCQMSampler()
-    result = sampler.sample_cqm(cqm, label="DeFi Quantum Routing")
+    start = time.perf_counter()
+    quantities = solve_routing_exact(venues, total_shares, chunk_size)
+    stats = {"solver": "exact", "solve_seconds": time.perf_counter() - start}
+    if quantities is None:
+        return {"error": f"{total_shares} units cannot be routed in chunks of {chunk_size} within the venues' capacity."}
+
+    if solver == "cqm":
+        model = build_routing_cqm(venues, total_shares, chunk_size)
+        start = time.perf_counter()
+        result = sampler.sample_cqm(model["cqm"], label="DeFi Quantum Routing")
+        feasible = result.filter(lambda d: d.is_feasible)
+        feasibility_rate = len(feasible) / max(len(result), 1)
+        if len(feasible) == 0:
+            return {"error": "The CQM solver returned no feasible routing.", "feasibility_rate": feasibility_rate}
+        cqm_quantities = routing_quantities(model["grid"], feasible.first.sample)
+        stats = {
+            "solver": "cqm",
+            **sampler.info(),
+            "model_build_seconds": model["build_seconds"],
+            "solve_seconds": time.perf_counter() - start,
+            "feasibility_rate": feasibility_rate,
+            "optimality_gap": optimality_gap(venues, cqm_quantities, quantities)
+        }
+        quantities = cqm_quantities
 
-    solution = result.first.sample
     routing_plan = []
     total_cost = 0.0
 
-    for (i, q), var in x.items():
-        if solution[var.name] == 1:
+    for i, q in enumerate(quantities.tolist()):
+        if q > 0:
             venue = venues[i]
             routing_plan.append({
                 "venue": venue["name"],
@@ -86,7 +103,8 @@ def route_order_optimally(total_shares=1000, chunk_size=100):
 
     return {
         "routing_plan": routing_plan,
-        "total_cost": round(total_cost, 4)
+        "total_cost": round(total_cost, 4),
+        **stats
     }
 
 
@@ -1,7 +1,8 @@
 import numpy as np
 import requests
 import dimod
-from dwave.system import EmbeddingComposite, DWaveSampler
+
+from quantum_tools.solver_backends import get_backend
 
 def fetch_live_volume_profile(time_slots, token_pair=("USDC", "ETH")):
     """
@@ -23,6 +24,15 @@ def fetch_live_volume_profile(time_slots, token_pair=("USDC", "ETH")):
         return default / default.sum()
 
 def generate_order_slicing_qubo(total_quantity, time_slots, lot_sizes, volume_profile):
+    """
+    QUBO over x[t, i] = "slot t trades lot i", in units of the smallest nonzero lot:
+        tracking  sum_t sum_i (lot_i - target_t)^2 x[t, i]
+        total     lambda_total * (sum lot_i x[t, i] - total_quantity)^2
+        one-hot   penalty * sum_t (sum_i x[t, i] - 1)^2
+    lambda_total exceeds any tracking error, so the total is met whenever the lots allow it.
+    penalty exceeds the largest tracking-plus-total energy of any one-lot-per-slot plan, so
+    every sample violating one-hot is worse than the best valid plan.
+    """
     n_slots = len(time_slots)
     n_lots = len(lot_sizes)
     N = n_slots * n_lots
@@ -30,63 +40,79 @@ def generate_order_slicing_qubo(total_quantity, time_slots, lot_sizes, volume_pr
     def var_index(t, i):
         return t * n_lots + i
 
+    unit = min(lot for lot in lot_sizes if lot > 0)
+    lots = [lot / unit for lot in lot_sizes]
+    total = total_quantity / unit
+    targets = [volume_profile[t] * total for t in range(n_slots)]
+
     Q = dimod.BinaryQuadraticModel({}, {}, 0.0, dimod.BINARY)
 
     for t in range(n_slots):
-        target = volume_profile[t] * total_quantity
-        for i, lot in enumerate(lot_sizes):
-            xi = var_index(t, i)
-            coeff = (lot - target) ** 2
-            Q.add_variable(xi, coeff)
+        for i, lot in enumerate(lots):
+            Q.add_variable(var_index(t, i), (lot - targets[t]) ** 2)
+
+    max_tracking = sum(max((lot - target) ** 2 for lot in lots) for target in targets)
+    lambda_total = 1.0 + max_tracking
+    for i in range(N):
+        lot_i = lots[i % n_lots]
+        Q.add_linear(i, lambda_total * (lot_i ** 2 - 2 * total * lot_i))  # x * x = x for binaries
+        for j in range(i + 1, N):
+            Q.add_interaction(i, j, 2 * lambda_total * lot_i * lots[j % n_lots])
+    Q.offset += lambda_total * total ** 2
 
-    penalty = 1e4
+    penalty = 1.0 + max_tracking + lambda_total * max(total, n_slots * max(lots) - total) ** 2
     for t in range(n_slots):
         for i in range(n_lots):
             xi = var_index(t, i)
-            Q.add_interaction(xi, xi, penalty)
+            Q.add_linear(xi, -penalty)
             for j in range(i + 1, n_lots):
-                xj = var_index(t, j)
-                Q.add_interaction(xi, xj, 2 * penalty)
-
-    lambda_total = 1000
-    for i in range(N):
-        for j in range(N):
-            lot_val_i = lot_sizes[i % n_lots]
-            lot_val_j = lot_sizes[j % n_lots]
-            Q.add_interaction(i, j, lambda_total * lot_val_i * lot_val_j)
-        Q.add_variable(i, Q.get_linear(i) - 2 * lambda_total * total_quantity * lot_sizes[i % n_lots])
-
-    Q.offset += lambda_total * total_quantity ** 2
+                Q.add_interaction(xi, var_index(t, j), 2 * penalty)
+    Q.offset += penalty * n_slots
     return Q
 
-def solve_order_slicing_live(total_quantity, time_slots, token_pair=("USDC", "ETH"), use_quantum=False):
+DEFAULT_TIME_SLOTS = ["09:30", "09:35", "09:40", "09:45", "09:50"]
+
+def solve_order_slicing_live(total_quantity, time_slots=None, token_pair=("USDC", "ETH"), use_quantum=False,
+                             backend=None, time_limit=None, num_reads=None):
     """
     Solves order slicing using live volume data from a DeFi API.
 
     Args:
         total_quantity (int): Total quantity to slice.
-        time_slots (list): List of time slots.
+        time_slots (list): List of time slots (default DEFAULT_TIME_SLOTS).
         token_pair (tuple): Token pair like ("USDC", "ETH").
-        use_quantum (bool): Whether to use a D-Wave quantum backend.
+        use_quantum (bool): Whether to use the D-Wave quantum backend (same as backend="dwave").
+        backend (str): Solver backend ("dwave", "anneal", "tabu"; default from QUANTUM_SOLVER_BACKEND).
+        time_limit (float), num_reads (int): The backend's time (seconds) and read budgets.
 
     Returns:
         dict: Slot → Assigned lot size
     """
+    time_slots = time_slots or DEFAULT_TIME_SLOTS
+    try:
+        sampler = get_backend("dwave" if use_quantum else backend, time_limit, num_reads)
+    except ValueError as e:
+        return {"error": str(e)}
+
     volume_profile = fetch_live_volume_profile(time_slots, token_pair)
     lot_sizes = [0, 1000, 2000, 3000]  # could also be dynamic from data
 
     bqm = generate_order_slicing_qubo(total_quantity, time_slots, lot_sizes, volume_profile)
 
-    sampler = EmbeddingComposite(DWaveSampler()) if use_quantum else dimod.SimulatedAnnealingSampler()
-    sampleset = sampler.sample(bqm, num_reads=100)
-    best_sample = sampleset.first.sample
+    sampleset = sampler.sample_bqm(bqm)
 
-    result = {}
+    # Lowest-energy sample with exactly one lot per slot.
     n_lots = len(lot_sizes)
-    for t, slot in enumerate(time_slots):
-        for i, lot in enumerate(lot_sizes):
-            if best_sample[t * n_lots + i] == 1:
-                result[slot] = lot
+    for best_sample in sampleset.samples():
+        chosen = [[i for i in range(n_lots) if best_sample[t * n_lots + i] == 1] for t in range(len(time_slots))]
+        if all(len(lots) == 1 for lots in chosen):
+            break
+    else:
+        return {"error": "No sample assigned exactly one lot to every slot."}
+
+    result = {slot: lot_sizes[lots[0]] for slot, lots in zip(time_slots, chosen)}
+    if sum(result.values()) != total_quantity:
+        print(f"⚠️ Sliced {sum(result.values())} of {total_quantity}: not reachable with lot sizes {lot_sizes}.")
     return result
 
 # === Example usage ===
@@ -0,0 +1,169 @@
+"""
+Chunked Order-Routing Model
+
+Builds the routing CQM shared by quantum_order_routing.py and quantum_tools/order_routing.py.
+Quantities are unary-encoded: venue i gets one binary x_{i}_{k} per chunk it can take
+(k = 1 .. max // chunk), so it routes chunk * sum_k x_{i}_{k}. The objective is linear,
+(fee + slippage) * chunk per chunk, and the only constraint is sum(chunk * x) == total_shares.
+Each single bit flip moves one chunk, which keeps the model easy for local samplers (a
+one-hot choice among quantities needs two flips through an infeasible state to change one).
+When the order size is not a multiple of the chunk size, the remainder is routed as one
+residual unit to a single venue (binaries r_{i}), so every order size stays routable without
+shrinking the chunks.
+
+The variable grid is laid out as NumPy arrays and every expression is handed to dimod in
+bulk (BinaryQuadraticModel.from_numpy_vectors), so construction is linear in the number of
+variables instead of rebuilding the objective expression once per variable.
+
+Because the costs are linear the model can also be solved exactly without a sampler
+(solve_routing_exact); samples from the CQM path are compared with that optimum via
+optimality_gap.
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from dimod import BINARY, BinaryQuadraticModel, ConstrainedQuadraticModel
+
+_NO_INTERACTIONS = (np.empty(0, dtype=int), np.empty(0, dtype=int), np.empty(0))
+
+
+def routing_grid(venues: List[Dict[str, Any]], chunk_size: int, limit: Optional[int] = None,
+                 remainder: int = 0) -> Dict[str, Any]:
+    """
+    Variable grid of the chunked routing model: one binary per chunk, flattened venue by venue.
+    'limit' caps every venue's maximum (e.g. at the order size). A nonzero 'remainder'
+    (order size modulo chunk size) is routed as one residual unit: a binary r_{i} per venue
+    that can hold it.
+
+    Returns a dict of equal-length arrays "venue" (venue index), "quantity" (the chunk size)
+    and "cost" (the objective coefficient), the variable "labels" and "offsets", where venue i
+    owns positions offsets[i]:offsets[i + 1], the venue "capacity", and the "remainder" with
+    its "residual_venues" and "residual_labels".
+    """
+    chunk_size = max(1, int(chunk_size))
+    maxima = np.array([int(v["max"]) for v in venues], dtype=np.int64)
+    if limit is not None:
+        maxima = np.minimum(maxima, int(limit))
+    counts = np.maximum(maxima, 0) // chunk_size
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    venue = np.repeat(np.arange(len(venues)), counts)
+    # Chunk number within the venue's block, from 1.
+    chunk = np.arange(offsets[-1]) - offsets[venue] + 1
+    quantity = np.full(offsets[-1], chunk_size, dtype=np.int64)
+    unit_cost = np.array([v["fee"] + v["slippage"] for v in venues], dtype=float)
+    residual_venues = np.flatnonzero(maxima >= remainder) if remainder else np.empty(0, dtype=np.int64)
+    return {
+        "venue": venue,
+        "quantity": quantity,
+        "cost": unit_cost[venue] * quantity,
+        "labels": [f"x_{i}_{k}" for i, k in zip(venue.tolist(), chunk.tolist())],
+        "offsets": offsets,
+        "chunk_size": chunk_size,
+        "capacity": np.maximum(maxima, 0),
+        "unit_cost": unit_cost,
+        "remainder": int(remainder),
+        "residual_venues": residual_venues,
+        "residual_labels": [f"r_{i}" for i in residual_venues.tolist()]
+    }
+
+
+def _linear_model(biases: np.ndarray, labels: List[str]) -> BinaryQuadraticModel:
+    return BinaryQuadraticModel.from_numpy_vectors(biases, _NO_INTERACTIONS, 0.0, BINARY, variable_order=labels)
+
+
+def build_routing_cqm(venues: List[Dict[str, Any]], total_shares: int, chunk_size: int,
+                      limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Routing CQM for 'total_shares' over 'venues'. Returns {"cqm", "grid", "build_seconds"},
+    with the grid as returned by routing_grid.
+    """
+    start = time.perf_counter()
+    chunk_size = max(1, int(chunk_size))
+    grid = routing_grid(venues, chunk_size, limit, remainder=total_shares % chunk_size)
+    labels, offsets = grid["labels"], grid["offsets"]
+    remainder, residual_venues, residual_labels = grid["remainder"], grid["residual_venues"], grid["residual_labels"]
+    all_labels = labels + residual_labels
+    residual_quantity = np.full(len(residual_labels), float(remainder))
+
+    cqm = ConstrainedQuadraticModel()
+    cqm.set_objective(_linear_model(
+        np.concatenate([grid["cost"], grid["unit_cost"][residual_venues] * remainder]), all_labels))
+    cqm.add_constraint_from_model(
+        _linear_model(np.concatenate([grid["quantity"].astype(float), residual_quantity]), all_labels),
+        "==", total_shares, label="total_shares", copy=False)
+    if remainder:
+        cqm.add_constraint_from_model(_linear_model(np.ones(len(residual_labels)), residual_labels), "==", 1,
+                                      label="residual_venue", copy=False)
+        # Where all chunks plus the residual exceed the capacity, the last chunk and the residual
+        # exclude each other (the bits are interchangeable, so this caps the venue at one chunk less).
+        for i, label in zip(residual_venues.tolist(), residual_labels):
+            capacity = int(grid["capacity"][i])
+            if offsets[i + 1] > offsets[i] and capacity % chunk_size < remainder:
+                cqm.add_constraint_from_model(_linear_model(np.ones(2), [labels[offsets[i + 1] - 1], label]),
+                                              "<=", 1, label=f"capacity_venue_{i}", copy=False)
+    return {"cqm": cqm, "grid": grid, "build_seconds": time.perf_counter() - start}
+
+
+def solve_routing_exact(venues: List[Dict[str, Any]], total_shares: int, chunk_size: int,
+                        limit: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    Exact optimum of the chunked routing model: the quantity routed to each venue, or None
+    if no allocation on the chunk grid (plus the residual unit) adds up to 'total_shares'.
+
+    Costs are linear, so for a fixed residual venue the model in units of chunks is
+    min sum c_i k_i subject to sum k_i = K and 0 <= k_i <= m_i. Filling the venues in order
+    of unit cost c_i is optimal (moving a chunk from a cheaper venue to a dearer one never
+    lowers the cost) and the fill is integral because every capacity m_i is. Trying each
+    venue for the residual and keeping the cheapest fill is then exact in O(V^2).
+    """
+    chunk_size = max(1, int(chunk_size))
+    if total_shares < 0:
+        return None
+    remainder = total_shares % chunk_size
+    # A handful of venues: plain Python beats NumPy's per-call overhead here.
+    capacity = [max(0, int(v["max"]) if limit is None else min(int(v["max"]), int(limit))) for v in venues]
+    unit_cost = [v["fee"] + v["slippage"] for v in venues]
+    order = sorted(range(len(venues)), key=unit_cost.__getitem__)
+
+    best, best_cost = None, None
+    for residual in ([None] if remainder == 0 else [i for i in order if capacity[i] >= remainder]):
+        remaining = total_shares // chunk_size
+        quantities = [0] * len(venues)
+        for i in order:
+            chunks = min((capacity[i] - (remainder if i == residual else 0)) // chunk_size, remaining)
+            quantities[i] = chunks * chunk_size
+            remaining -= chunks
+        if remaining:
+            continue
+        if residual is not None:
+            quantities[residual] += remainder
+        cost = sum(c * q for c, q in zip(unit_cost, quantities))
+        if best is None or cost < best_cost:
+            best, best_cost = quantities, cost
+    return None if best is None else np.array(best, dtype=np.int64)
+
+
+def routing_quantities(grid: Dict[str, Any], sample: Dict[str, Any]) -> np.ndarray:
+    """Quantity routed to each venue by a sample of the routing CQM."""
+    chosen = np.array([sample.get(label, 0) for label in grid["labels"]], dtype=float)
+    quantities = np.bincount(grid["venue"], weights=chosen * grid["quantity"], minlength=len(grid["offsets"]) - 1)
+    residual = np.array([sample.get(label, 0) for label in grid["residual_labels"]], dtype=float)
+    quantities[grid["residual_venues"]] += residual * grid["remainder"]
+    return quantities.astype(np.int64)
+
+
+def routing_cost(venues: List[Dict[str, Any]], quantities: np.ndarray) -> float:
+    return float(np.dot([v["fee"] + v["slippage"] for v in venues], quantities))
+
+
+def optimality_gap(venues: List[Dict[str, Any]], quantities: np.ndarray, optimal: np.ndarray) -> Dict[str, float]:
+    """Cost of 'quantities' against the exact optimum 'optimal'."""
+    cost, optimum = routing_cost(venues, quantities), routing_cost(venues, optimal)
+    return {
+        "cost": cost,
+        "optimal_cost": optimum,
+        "absolute": cost - optimum,
+        "relative": (cost - optimum) / optimum if optimum else 0.0
+    }
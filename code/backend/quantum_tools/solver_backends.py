@@ -0,0 +1,156 @@
+"""
+Solver Backends
+
+Pluggable samplers for the routing, slicing and venue-selection models:
+    dwave   D-Wave Leap - LeapHybridCQMSampler for CQMs, EmbeddingComposite(DWaveSampler()) for BQMs
+    anneal  local simulated annealing (dwave-samplers)
+    tabu    local tabu search (dwave-samplers)
+
+The local backends need no cloud access. They solve a CQM by converting it to a penalty
+BQM (cqm_to_penalty_bqm), sampling that, and mapping the samples back onto the CQM with
+their feasibility, so callers handle both kinds of backend the same way.
+
+Every backend takes a time budget (seconds) and a read budget. The time budget is an
+upper bound: simulated annealing stops starting new reads once it is spent, and tabu
+search splits it evenly over its reads but ends a read after TABU_NUM_RESTARTS restarts,
+usually well before its share of the budget. The hybrid solver's time limit is raised to
+the minimum Leap accepts for the model and is used in full; QPU sampling only honours
+num_reads.
+
+Configuration:
+    QUANTUM_SOLVER_BACKEND     default backend (default "anneal")
+    QUANTUM_SOLVER_TIME_LIMIT  default time budget in seconds (default 5)
+    QUANTUM_SOLVER_NUM_READS   default read budget (default 100)
+    QUANTUM_TABU_NUM_RESTARTS  tabu restarts per read before it stops (default 1)
+"""
+
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import dimod
+from dwave.samplers import SimulatedAnnealingSampler, TabuSampler
+
+DEFAULT_BACKEND = os.getenv("QUANTUM_SOLVER_BACKEND", "anneal")
+DEFAULT_TIME_LIMIT = float(os.getenv("QUANTUM_SOLVER_TIME_LIMIT", 5))
+DEFAULT_NUM_READS = int(os.getenv("QUANTUM_SOLVER_NUM_READS", 100))
+TABU_NUM_RESTARTS = int(os.getenv("QUANTUM_TABU_NUM_RESTARTS", 1))
+
+SOLVER_BACKENDS: Dict[str, Callable[..., "SolverBackend"]] = {}
+
+
+def register_backend(name: str):
+    """Class decorator adding a backend to SOLVER_BACKENDS under 'name'."""
+    def register(cls):
+        cls.name = name
+        SOLVER_BACKENDS[name] = cls
+        return cls
+    return register
+
+
+def get_backend(name: Optional[str] = None, time_limit: Optional[float] = None,
+                num_reads: Optional[int] = None) -> "SolverBackend":
+    """Backend 'name' (default QUANTUM_SOLVER_BACKEND) with the given budgets; ValueError if unknown."""
+    name = name or DEFAULT_BACKEND
+    if name not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown solver backend '{name}'; choose one of {sorted(SOLVER_BACKENDS)}.")
+    return SOLVER_BACKENDS[name](time_limit=time_limit, num_reads=num_reads)
+
+
+def cqm_to_penalty_bqm(cqm: dimod.ConstrainedQuadraticModel,
+                       strength: float = 2.0) -> Tuple[dimod.BinaryQuadraticModel, Callable]:
+    """
+    Penalty BQM for a binary CQM with linear constraints, and a function mapping its samples
+    back onto the CQM's variables (as dimod.cqm_to_bqm).
+
+    Unlike dimod.cqm_to_bqm, which uses one multiplier for every constraint, each constraint
+    is first divided by its smallest coefficient so that its smallest violation costs
+    'strength' times the largest objective bias, whatever the scale of its coefficients.
+    At-most-one constraints become pairwise penalties without slack variables.
+    Other models fall back to dimod.cqm_to_bqm.
+    """
+    objective = cqm.objective
+    if any(cqm.vartype(v) is not dimod.BINARY for v in cqm.variables) or objective.num_interactions or \
+            any(c.lhs.num_interactions for c in cqm.constraints.values()):
+        return dimod.cqm_to_bqm(cqm)
+    bqm = dimod.BinaryQuadraticModel(dimod.BINARY)
+    bqm.add_linear_from((v, objective.get_linear(v)) for v in cqm.variables)
+    bqm.offset = objective.offset
+    lagrange = strength * (max((abs(b) for b in bqm.linear.values()), default=0.0) or 1.0)
+
+    for label, constraint in cqm.constraints.items():
+        lhs = constraint.lhs
+        terms = [(v, lhs.get_linear(v)) for v in lhs.variables if lhs.get_linear(v)]
+        if not terms:
+            continue
+        unit = min(abs(b) for _, b in terms)
+        terms = [(v, b / unit) for v, b in terms]
+        rhs = (constraint.rhs - lhs.offset) / unit
+        sense = constraint.sense.value
+        if sense == "<=" and rhs == 1 and all(b == 1 for _, b in terms):
+            for i, (u, _) in enumerate(terms):
+                bqm.add_quadratic_from((u, v, lagrange) for v, _ in terms[i + 1:])
+        elif sense == "==":
+            bqm.add_linear_equality_constraint(terms, lagrange, -rhs)
+        else:
+            if sense == ">=":
+                terms, rhs = [(v, -b) for v, b in terms], -rhs
+            bqm.add_linear_inequality_constraint(terms, lagrange, str(label), constant=-rhs)
+    variables = list(cqm.variables)
+    return bqm, lambda sample: {v: sample[v] for v in variables}
+
+
+class SolverBackend:
+    """Samples BQMs and CQMs within a time and read budget."""
+
+    name = None
+
+    def __init__(self, time_limit: Optional[float] = None, num_reads: Optional[int] = None):
+        self.time_limit = DEFAULT_TIME_LIMIT if time_limit is None else float(time_limit)
+        self.num_reads = DEFAULT_NUM_READS if num_reads is None else int(num_reads)
+        if self.time_limit <= 0 or self.num_reads < 1:
+            raise ValueError("time_limit must be positive and num_reads at least 1.")
+
+    def sample_bqm(self, bqm: dimod.BinaryQuadraticModel) -> dimod.SampleSet:
+        raise NotImplementedError
+
+    def sample_cqm(self, cqm: dimod.ConstrainedQuadraticModel, label: str = None) -> dimod.SampleSet:
+        """CQM sample set with feasibility, sampled through a penalty BQM."""
+        bqm, invert = cqm_to_penalty_bqm(cqm)
+        sampleset = self.sample_bqm(bqm)
+        return dimod.SampleSet.from_samples_cqm([invert(sample) for sample in sampleset.samples()], cqm)
+
+    def info(self) -> Dict[str, object]:
+        return {"backend": self.name, "time_limit": self.time_limit, "num_reads": self.num_reads}
+
+
+@register_backend("anneal")
+class AnnealingBackend(SolverBackend):
+
+    def sample_bqm(self, bqm):
+        deadline = time.perf_counter() + self.time_limit
+        return SimulatedAnnealingSampler().sample(bqm, num_reads=self.num_reads,
+                                                  interrupt_function=lambda: time.perf_counter() > deadline)
+
+
+@register_backend("tabu")
+class TabuBackend(SolverBackend):
+
+    def sample_bqm(self, bqm):
+        # TabuSampler's timeout is in milliseconds per read, and a read runs until its timeout
+        # unless it stops after num_restarts restarts, so small models finish well within it.
+        timeout = max(1, int(1000 * self.time_limit / self.num_reads))
+        return TabuSampler().sample(bqm, num_reads=self.num_reads, timeout=timeout, num_restarts=TABU_NUM_RESTARTS)
+
+
+@register_backend("dwave")
+class DWaveBackend(SolverBackend):
+
+    def sample_bqm(self, bqm):
+        from dwave.system import DWaveSampler, EmbeddingComposite
+        return EmbeddingComposite(DWaveSampler()).sample(bqm, num_reads=self.num_reads)
+
+    def sample_cqm(self, cqm, label=None):
+        from dwave.system import LeapHybridCQMSampler
+        sampler = LeapHybridCQMSampler()
+        return sampler.sample_cqm(cqm, time_limit=max(self.time_limit, sampler.min_time_limit(cqm)), label=label)
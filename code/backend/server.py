@@ -2,35 +2,26 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import requests
 import os
-import numpy as np
 
 from classical_tools.order_slicer import run_twap, run_vwap
 from quantum_tools.order_routing import route_order_optimally
 from quantum_tools.order_slicer import solve_order_slicing_live
 from quantum_tools.latency_aware_costs import select_optimal_venue
+from quantum_order_routing import optimize_order_routing
 
 from endpoints.quantum_TDA import quantum_tda_endpoint
-from endpoints.monte_carlo import quantum_monte_carlo_endpoint
+from endpoints.serialization import sanitize_for_json
+from endpoints.incremental_kernel import incremental_tda_endpoint
+from endpoints.timeseries_tda import timeseries_tda_endpoint
+from endpoints.diagram_distances import diagram_distances_endpoint
+from endpoints.tda_sweep import tda_sweep_endpoint
+from endpoints.monte_carlo import quantum_monte_carlo_endpoint, regenerate_paths_endpoint
+from endpoints.calibration import calibration_cache
+from endpoints.datasets import dataset_registry
 
 app = Flask(__name__)
 CORS(app)
 
-def sanitize_for_json(obj):
-    """Recursively replace inf, -inf, nan in a structure with safe JSON values."""
-    if isinstance(obj, float):
-        if np.isnan(obj):
-            return 0
-        if np.isinf(obj):
-            return 10000
-        return obj
-    elif isinstance(obj, list):
-        return [sanitize_for_json(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {k: sanitize_for_json(v) for k, v in obj.items()}
-    else:
-        return obj
-
-
 # === Routes ===
 @app.route("/api/quantum_tda", methods=["POST"])
 def quantum_tda_api():
@@ -39,8 +30,35 @@ def quantum_tda_api():
 
         data_identifier = input_data.get("data_identifier", None)
         use_pauli = input_data.get("use_pauli", False)
-
-        result = quantum_tda_endpoint(data_identifier=data_identifier, use_pauli=use_pauli)
+        kernel_method = input_data.get("kernel_method", "statevector")
+        nystrom_landmarks = input_data.get("nystrom_landmarks", None)
+        landmark_method = input_data.get("landmark_method", "kmeans++")
+        parallel_workers = input_data.get("parallel_workers", None)
+        tile_size = input_data.get("tile_size", 256)
+        maxdim = input_data.get("maxdim", None)
+        thresh = input_data.get("thresh", None)
+        n_perm = input_data.get("n_perm", None)
+        filtration = input_data.get("filtration", "dense")
+        knn_k = input_data.get("knn_k", 15)
+        include = input_data.get("include", "all")
+        matrix_format = input_data.get("matrix_format", "dense")
+        dataset_id = input_data.get("dataset_id", None)
+        summaries = input_data.get("summaries", False)
+        summary_resolution = input_data.get("summary_resolution", 100)
+        diagram_distance = input_data.get("diagram_distance", None)
+        reduction = input_data.get("reduction", "pca")
+        max_qubits = input_data.get("max_qubits", None)
+
+        result = quantum_tda_endpoint(data_identifier=data_identifier, use_pauli=use_pauli,
+                                      kernel_method=kernel_method, nystrom_landmarks=nystrom_landmarks,
+                                      landmark_method=landmark_method, parallel_workers=parallel_workers,
+                                      tile_size=tile_size, maxdim=maxdim, thresh=thresh, n_perm=n_perm,
+                                      filtration=filtration, knn_k=knn_k,
+                                      include=include, matrix_format=matrix_format,
+                                      dataset_id=dataset_id, summaries=summaries,
+                                      summary_resolution=summary_resolution,
+                                      diagram_distance=diagram_distance,
+                                      reduction=reduction, max_qubits=max_qubits)
 
         # Sanitize result for safe JSON output
         clean_result = sanitize_for_json(result)
@@ -51,6 +69,135 @@ def quantum_tda_api():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/datasets", methods=["POST"])
+def upload_dataset():
+    try:
+        upload = request.files.get("file")
+        if upload is None:
+            return jsonify({"error": "file not provided"}), 400
+
+        file_format = request.form.get("format") or \
+            ("parquet" if upload.filename.lower().endswith(".parquet") else "csv")
+        columns = request.form.get("columns")
+        columns = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+        standardize = request.form.get("standardize", "true").lower() != "false"
+
+        try:
+            metadata = dataset_registry.ingest(upload.stream, file_format=file_format, columns=columns,
+                                               standardize=standardize, name=upload.filename)
+        except (ValueError, KeyError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify(metadata)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/datasets", methods=["GET"])
+def list_datasets():
+    try:
+        return jsonify(dataset_registry.list())
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/quantum_tda/incremental", methods=["POST"])
+def incremental_tda_api():
+    try:
+        input_data = request.get_json(silent=True) or {}
+
+        result = incremental_tda_endpoint(
+            dataset_id=input_data.get("dataset_id", None),
+            rows=input_data.get("rows", None),
+            use_pauli=input_data.get("use_pauli", False),
+            gamma=input_data.get("gamma", 0.001),
+            max_rows=input_data.get("max_rows", None),
+            reset=input_data.get("reset", False),
+            include_matrices=input_data.get("include_matrices", False)
+        )
+        if "error" in result:
+            return jsonify(result), 400
+
+        return jsonify(sanitize_for_json(result))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/quantum_tda/timeseries", methods=["POST"])
+def timeseries_tda_api():
+    try:
+        input_data = request.get_json(silent=True) or {}
+
+        result = timeseries_tda_endpoint(
+            prices=input_data.get("prices", None),
+            pair=input_data.get("pair", None),
+            window=input_data.get("window", 60),
+            stride=input_data.get("stride", 5),
+            embedding_dimension=input_data.get("embedding_dimension", 3),
+            delay=input_data.get("delay", 1),
+            use_pauli=input_data.get("use_pauli", False),
+            gamma=input_data.get("gamma", 0.001),
+            maxdim=input_data.get("maxdim", 1),
+            num_workers=input_data.get("num_workers", None),
+            include_diagrams=input_data.get("include_diagrams", False)
+        )
+        if "error" in result:
+            return jsonify(result), 400
+
+        return jsonify(sanitize_for_json(result))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/quantum_tda/sweep", methods=["POST"])
+def tda_sweep_api():
+    try:
+        input_data = request.get_json(silent=True) or {}
+
+        result = tda_sweep_endpoint(
+            data_identifier=input_data.get("data_identifier", 2),
+            dataset_id=input_data.get("dataset_id", None),
+            map_types=input_data.get("map_types", ["zz"]),
+            reps=input_data.get("reps", [1, 2, 3]),
+            entanglements=input_data.get("entanglements", ["full"]),
+            gammas=input_data.get("gammas", [0.001, 0.01, 0.1, 1.0]),
+            maxdim=input_data.get("maxdim", None),
+            vectorized_summaries=input_data.get("vectorized_summaries", False),
+            summary_resolution=input_data.get("summary_resolution", 100),
+            reduction=input_data.get("reduction", "pca"),
+            max_qubits=input_data.get("max_qubits", None)
+        )
+        if "error" in result:
+            return jsonify(result), 400
+
+        return jsonify(sanitize_for_json(result))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/diagram_distances", methods=["POST"])
+def diagram_distances_api():
+    try:
+        input_data = request.get_json(silent=True) or {}
+
+        result = diagram_distances_endpoint(
+            diagrams=input_data.get("diagrams", None),
+            metric=input_data.get("metric", "sliced_wasserstein")
+        )
+        if "error" in result:
+            return jsonify(result), 400
+
+        return jsonify(sanitize_for_json(result))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/quantum_mc", methods=["GET", "POST"])
 def simulate():
     try:
@@ -73,6 +220,56 @@ def simulate():
             sim_qubits=sim_qubits,
             max_eval_qubits=max_eval_qubits
         )
+        if "error" in result:
+            return jsonify(result), 400
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/quantum_mc/paths", methods=["POST"])
+def regenerate_mc_paths():
+    try:
+        json_data = request.get_json() or {}
+        result = regenerate_paths_endpoint(
+            input_data=json_data.get("input_data", None),
+            seed=json_data.get("seed", None),
+            path_indices=json_data.get("path_indices", None),
+            sigma=json_data.get("sigma", None),
+            r=json_data.get("r", None)
+        )
+        if "error" in result:
+            return jsonify(result), 400
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/calibration", methods=["GET"])
+def get_calibration():
+    try:
+        pair = request.args.get("pair")
+        if not pair:
+            return jsonify({"error": "pair is required."}), 400
+        window = int(request.args.get("window", 30))
+        return jsonify(calibration_cache.get(pair, window))
+
+    except KeyError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/calibration/prices", methods=["POST"])
+def append_calibration_prices():
+    try:
+        data = request.get_json() or {}
+        pair = data.get("pair")
+        if not pair:
+            return jsonify({"error": "pair is required."}), 400
+        result = calibration_cache.append_prices(pair, data.get("timestamps", []), data.get("prices", []))
         return jsonify(result)
 
     except Exception as e:
@@ -83,14 +280,21 @@ def simulate():
 def quantum_order_slicing():
     data = request.json
     total_shares = data.get("total_shares", 1000)
-    result = solve_order_slicing_live(total_shares)
+    result = solve_order_slicing_live(total_shares, time_slots=data.get("time_slots"),
+                                      backend=data.get("backend"), time_limit=data.get("time_limit"),
+                                      num_reads=data.get("num_reads"))
+    if "error" in result:
+        return jsonify(result), 400
     return jsonify(result)
 
 @app.route("/quantum/order-routing", methods=["POST"])
 def quantum_order_routing_endpoint():
     data = request.json
     total_shares = data.get("total_shares", 1000)
-    result = route_order_optimally(total_shares)
+    result = route_order_optimally(total_shares, solver=data.get("solver", "exact"), backend=data.get("backend"),
+                                   time_limit=data.get("time_limit"), num_reads=data.get("num_reads"))
+    if "error" in result:
+        return jsonify(result), 400
     return jsonify(result)
 
 @app.route("/quantum/latency-costs", methods=["POST"])
@@ -98,7 +302,10 @@ def quantum_latency_costs_endpoint():
     data = request.json
     order_volume = data.get("order_volume", 100000)
     time_remaining = data.get("time_remaining", 5)
-    diagnostics = select_optimal_venue(order_volume, time_remaining)
+    diagnostics = select_optimal_venue(order_volume, time_remaining, backend=data.get("backend"),
+                                       time_limit=data.get("time_limit"), num_reads=data.get("num_reads"))
+    if "error" in diagnostics:
+        return jsonify(diagnostics), 400
     return jsonify(diagnostics)
 
 @app.route("/classical/order-slicing/twap", methods=["POST"])
@@ -203,20 +410,21 @@ def brian_auto_route():
                 # Add the routing result to the response
                 response_data["quantum_routing"] = routing_result
 
-                # Enhance the text reply with quantum routing info
-                venues_text = ", ".join([
-                    f"{alloc['venue']} ({alloc['amount']/100:.2f} units)"
-                    for alloc in routing_result["venue_allocation"]
-                ])
+                if "error" not in routing_result:
+                    # Enhance the text reply with quantum routing info
+                    venues_text = ", ".join([
+                        f"{alloc['venue']} ({alloc['amount']/100:.2f} units)"
+                        for alloc in routing_result["venue_allocation"]
+                    ])
 
-                routing_summary = (
-                    f"\n\n🧠 Quantum Routing Optimization:\n"
-                    f"For your swap of {swap_amount} units, I've used quantum computing to optimize the routing:\n"
-                    f"• Optimal routing: {venues_text}\n"
-                    f"• Estimated total cost: ${routing_result['total_cost']:.6f}"
-                )
+                    routing_summary = (
+                        f"\n\n🧠 Quantum Routing Optimization:\n"
+                        f"For your swap of {swap_amount} units, I've used quantum computing to optimize the routing:\n"
+                        f"• Optimal routing: {venues_text}\n"
+                        f"• Estimated total cost: ${routing_result['total_cost']:.6f}"
+                    )
 
-                response_data["reply"] += routing_summary
+                    response_data["reply"] += routing_summary
 
         return jsonify(response_data)
 
@@ -225,4 +433,5 @@ def brian_auto_route():
 
 
 if __name__ == "__main__":
+    calibration_cache.warm()
     app.run(host='0.0.0.0', port=5002, debug=True)
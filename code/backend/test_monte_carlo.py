@@ -0,0 +1,64 @@
+"""
+Tests for the Monte Carlo pricer (endpoints/monte_carlo.py): the Longstaff-Schwartz
+early-exercise pricer, counter-based (Philox) path regeneration and the sharded
+aggregates merged by the cluster coordinator (endpoints/mc_cluster.py).
+"""
+
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from endpoints.mc_cluster import _merge_partials, run_shard
+from endpoints.monte_carlo import (PATH_BLOCK_SIZE, QuantumMonteCarloSimulator, _build_simulator,
+                                   european_call_payoff, european_put_payoff)
+
+
+def _black_scholes_call(S0, strike, r, sigma, T):
+    d1 = (np.log(S0 / strike) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    return S0 * norm.cdf(d1) - strike * np.exp(-r * T) * norm.cdf(d1 - sigma * np.sqrt(T))
+
+
+def test_american_put_matches_longstaff_schwartz_reference():
+    """S0=36, K=40, r=6%, sigma=20%, T=1: 4.478 in Longstaff and Schwartz (2001), European 3.844."""
+    simulator = QuantumMonteCarloSimulator(S0=36, r=0.06, sigma=0.2, T=1.0, strike=40, steps=50, paths=50000,
+                                           pricing_model=european_put_payoff)
+    result = simulator.price_early_exercise_option("american", seed=1)
+    assert result["estimated_price"] == pytest.approx(4.478, abs=0.05)
+    assert result["early_exercise_fraction"] > 0.5
+
+
+@pytest.mark.parametrize("exercise_style, exercise_dates", [("american", None), ("bermudan", 4)])
+def test_early_exercise_call_without_dividends_is_european(exercise_style, exercise_dates):
+    simulator = QuantumMonteCarloSimulator(S0=100, r=0.05, sigma=0.2, T=1.0, strike=100, steps=50, paths=50000,
+                                           pricing_model=european_call_payoff)
+    result = simulator.price_early_exercise_option(exercise_style, exercise_dates, seed=1)
+    reference = _black_scholes_call(100, 100, 0.05, 0.2, 1.0)
+    assert abs(result["estimated_price"] - reference) < 4 * result["standard_error"]
+    assert result["early_exercise_fraction"] < 0.01
+
+
+def test_regenerated_paths_match_the_simulation():
+    """Any path, including ones across block boundaries, is rebuilt from (seed, index) alone."""
+    simulator = QuantumMonteCarloSimulator(steps=20, paths=3 * PATH_BLOCK_SIZE + 17)
+    terminal_prices = simulator.simulate_terminal_prices(seed=7, chunk_size=100)
+    assert np.array_equal(terminal_prices, simulator.simulate_terminal_prices(seed=7, chunk_size=PATH_BLOCK_SIZE))
+
+    indices = [0, PATH_BLOCK_SIZE - 1, PATH_BLOCK_SIZE, 2 * PATH_BLOCK_SIZE + 5, simulator.paths - 1]
+    _, paths = simulator.regenerate_paths(7, indices)
+    assert paths.shape == (len(indices), simulator.steps + 1)
+    assert np.allclose(paths[:, -1], terminal_prices[indices], rtol=1e-12)
+    assert not np.allclose(simulator.simulate_terminal_prices(seed=8, stop=10), terminal_prices[:10])
+
+
+def test_merged_shards_match_a_single_pass():
+    input_data = {"S0": 100, "strike": 105, "steps": 16, "paths": 5000}
+    simulator, _ = _build_simulator(input_data)
+    _, discounted_payoffs = simulator.compute_option_price(simulator.simulate_terminal_prices(seed=3))
+
+    bounds = [0, 1000, 1001, 3500, 5000]
+    partials = [run_shard({"input_data": input_data, "seed": 3, "start": lo, "stop": hi, "bin_edges": [50, 150]})
+                for lo, hi in zip(bounds[:-1], bounds[1:])]
+    count, mean, m2, _ = _merge_partials(partials)
+    assert count == 5000
+    assert mean == pytest.approx(discounted_payoffs.mean(), rel=1e-12)
+    assert m2 / (count - 1) == pytest.approx(discounted_payoffs.var(ddof=1), rel=1e-12)
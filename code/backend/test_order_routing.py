@@ -0,0 +1,109 @@
+"""
+Tests for the chunked order-routing model and its exact solver (quantum_tools/routing_model.py),
+and for the order-slicing QUBO (quantum_tools/order_slicer.py).
+"""
+
+import itertools
+import random
+
+import dimod
+import numpy as np
+import pytest
+
+from quantum_tools.order_slicer import generate_order_slicing_qubo
+from quantum_tools.routing_model import build_routing_cqm, routing_cost, routing_quantities, solve_routing_exact
+from quantum_tools.solver_backends import get_backend
+from wormhole_wrapper import DEFAULT_VENUES
+
+
+def _allocation_ok(venues, quantities, total_shares, chunk_size, limit):
+    capacity = [max(0, min(v["max"], limit) if limit is not None else v["max"]) for v in venues]
+    off_grid = [q % chunk_size for q in quantities.tolist() if q % chunk_size]
+    return (quantities.sum() == total_shares
+            and all(0 <= q <= c for q, c in zip(quantities.tolist(), capacity))
+            and len(off_grid) <= 1 and sum(off_grid) == total_shares % chunk_size)
+
+
+def test_every_order_size_within_capacity_is_routed():
+    """The adaptive chunk size of optimize_order_routing must not reject orders that are not a multiple of it."""
+    total_capacity = sum(v["max"] for v in DEFAULT_VENUES)
+    rejected = []
+    for total_shares in range(100, total_capacity + 1):
+        chunk_size = max(1, total_shares // 100)
+        quantities = solve_routing_exact(DEFAULT_VENUES, total_shares, chunk_size, limit=total_shares)
+        if quantities is None:
+            rejected.append(total_shares)
+        else:
+            assert _allocation_ok(DEFAULT_VENUES, quantities, total_shares, chunk_size, total_shares), total_shares
+    # Only orders within a few chunks of the total capacity can fall between the chunk grids.
+    assert all(total_shares > total_capacity - 4 * (total_shares // 100) for total_shares in rejected), rejected
+    assert solve_routing_exact(DEFAULT_VENUES, total_capacity + 1, 1) is None
+
+
+def _brute_force(venues, total_shares, chunk_size, limit):
+    """Cheapest allocation of the chunked model with one residual unit, by enumeration."""
+    remainder = total_shares % chunk_size
+    capacity = [max(0, min(v["max"], limit) if limit is not None else v["max"]) for v in venues]
+    residuals = [None] if remainder == 0 else [i for i, c in enumerate(capacity) if c >= remainder]
+    best = None
+    for residual in residuals:
+        grids = [range(0, c - (remainder if i == residual else 0) + 1, chunk_size) for i, c in enumerate(capacity)]
+        for combo in itertools.product(*grids):
+            quantities = np.array(combo)
+            if residual is not None:
+                quantities[residual] += remainder
+            if quantities.sum() == total_shares:
+                cost = routing_cost(venues, quantities)
+                best = cost if best is None else min(best, cost)
+    return best
+
+
+def test_exact_solver_matches_brute_force():
+    rng = random.Random(1)
+    for _ in range(200):
+        venues = [{"name": str(i), "max": rng.randint(-1, 40), "fee": rng.choice([0.001, 0.002, 0.003]),
+                   "slippage": rng.random() / 100} for i in range(rng.randint(1, 3))]
+        total_shares, chunk_size = rng.randint(0, 80), rng.choice([1, 3, 5, 10])
+        limit = rng.choice([None, total_shares])
+        quantities = solve_routing_exact(venues, total_shares, chunk_size, limit)
+        best = _brute_force(venues, total_shares, chunk_size, limit)
+        if best is None:
+            assert quantities is None
+        else:
+            assert _allocation_ok(venues, quantities, total_shares, chunk_size, limit)
+            assert routing_cost(venues, quantities) == pytest.approx(best)
+
+
+@pytest.mark.parametrize("total_shares", [1000, 1057, 2299, 2713])
+def test_exact_solution_is_feasible_for_the_cqm(total_shares):
+    chunk_size = max(1, total_shares // 100)
+    quantities = solve_routing_exact(DEFAULT_VENUES, total_shares, chunk_size, limit=total_shares)
+    assert quantities is not None
+    model = build_routing_cqm(DEFAULT_VENUES, total_shares, chunk_size, limit=total_shares)
+    grid = model["grid"]
+    sample = dict.fromkeys(grid["labels"] + grid["residual_labels"], 0)
+    for i, q in enumerate(quantities.tolist()):
+        sample.update({f"x_{i}_{k}": 1 for k in range(1, q // chunk_size + 1)})
+        if q % chunk_size:
+            sample[f"r_{i}"] = 1
+    assert model["cqm"].check_feasible(sample)
+    assert (routing_quantities(grid, sample) == quantities).all()
+
+
+@pytest.mark.parametrize("backend", ["anneal", "tabu"])
+def test_local_backends_sample_feasible_routings(backend):
+    model = build_routing_cqm(DEFAULT_VENUES, 1057, 10, limit=1057)
+    sampleset = get_backend(backend, time_limit=1, num_reads=10).sample_cqm(model["cqm"])
+    feasible = sampleset.filter(lambda d: d.is_feasible)
+    assert len(feasible) >= len(sampleset) // 2
+    assert routing_quantities(model["grid"], feasible.first.sample).sum() == 1057
+
+
+@pytest.mark.parametrize("total_quantity", [3000, 6000, 9000, 10000])
+def test_slicing_ground_state_is_one_lot_per_slot_and_meets_the_total(total_quantity):
+    slots, lot_sizes = ["a", "b", "c"], [0, 1000, 2000, 3000]
+    bqm = generate_order_slicing_qubo(total_quantity, slots, lot_sizes, np.array([1, 2, 1]) / 4)
+    ground = dimod.ExactSolver().sample(bqm).first.sample
+    chosen = [[lot for i, lot in enumerate(lot_sizes) if ground[t * len(lot_sizes) + i]] for t in range(len(slots))]
+    assert all(len(lots) == 1 for lots in chosen)
+    assert sum(lots[0] for lots in chosen) == min(total_quantity, 3 * max(lot_sizes))
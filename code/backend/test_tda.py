@@ -0,0 +1,181 @@
+"""
+Tests for the quantum kernel TDA pipeline (endpoints/quantum_TDA.py), its kernel cache
+(endpoints/kernel_cache.py), the Nystrom and landmark approximations, the incremental
+kernel windows (endpoints/incremental_kernel.py), diagram distances, vectorized
+persistence summaries and the feature reduction to the qubit budget.
+"""
+
+import numpy as np
+import persim
+import pytest
+from sklearn.metrics.pairwise import euclidean_distances, rbf_kernel
+
+from endpoints.diagram_distances import bottleneck_distance, sliced_wasserstein_distance
+from endpoints.feature_reduction import reduce_to_qubit_budget
+from endpoints.incremental_kernel import IncrementalKernelStore
+from endpoints.kernel_cache import KernelCache
+from endpoints.persistence_summaries import diagram_range, persistent_entropy, summarize_diagrams
+from endpoints.quantum_TDA import (compute_persistence, compute_quantum_kernel_matrix, factors_to_distance,
+                                   kernel_to_distance, nystrom_quantum_kernel)
+
+
+@pytest.fixture
+def points():
+    return np.random.default_rng(0).uniform(0, np.pi, size=(6, 2))
+
+
+@pytest.mark.parametrize("use_pauli", [False, True])
+def test_statevector_kernel_matches_fidelity_kernel(points, use_pauli):
+    statevector = compute_quantum_kernel_matrix(points, use_pauli=use_pauli, method="statevector")
+    fidelity = compute_quantum_kernel_matrix(points, use_pauli=use_pauli, method="fidelity")
+    assert np.allclose(statevector, fidelity, atol=1e-8)
+    assert np.allclose(np.diag(statevector), 1.0)
+
+    cross = compute_quantum_kernel_matrix(points[:4], use_pauli=use_pauli, y_data=points[2:])
+    assert np.allclose(cross, statevector[:4, 2:], atol=1e-12)
+
+
+def test_kernel_cache_hit_returns_the_stored_matrices(points, tmp_path):
+    cache = KernelCache(cache_dir=str(tmp_path))
+    config = {"map_type": "zz", "reps": 2}
+    calls = []
+
+    def compute(data):
+        calls.append(len(data))
+        return compute_quantum_kernel_matrix(data)
+
+    kernel, distance, hit = cache.get_or_compute(points, config, compute, kernel_to_distance)
+    assert not hit
+    cached_kernel, cached_distance, hit = cache.get_or_compute(points.copy(), config, compute, kernel_to_distance)
+    assert hit and calls == [len(points)]
+    assert np.array_equal(cached_kernel, kernel) and np.array_equal(cached_distance, distance)
+
+    # A different configuration or different data is a different entry.
+    assert cache.key(points, {**config, "reps": 3}) != cache.key(points, config)
+    assert cache.key(points[:5], config) != cache.key(points, config)
+
+
+@pytest.mark.parametrize("landmark_method", ["kmeans++", "leverage"])
+def test_nystrom_with_every_point_as_landmark_is_exact(points, landmark_method):
+    factors, diagnostics = nystrom_quantum_kernel(points, len(points), landmark_method=landmark_method)
+    exact = compute_quantum_kernel_matrix(points)
+    assert np.allclose(factors @ factors.T, exact, atol=1e-8)
+    assert np.allclose(factors_to_distance(factors), kernel_to_distance(exact), atol=1e-6)
+    assert diagnostics["sampled_max_abs_error"] < 1e-8
+
+
+def test_landmark_and_thresholded_persistence_stay_within_their_bounds():
+    rng = np.random.default_rng(1)
+    angles = rng.uniform(0, 2 * np.pi, 300)
+    distance = euclidean_distances(np.column_stack((np.cos(angles), np.sin(angles))) + rng.normal(0, 0.05, (300, 2)))
+    full = compute_persistence(distance)
+
+    # Greedy-permutation landmarks: the diagrams move by at most twice the covering radius.
+    subsampled, info = compute_persistence(distance, n_perm=60, return_info=True)
+    assert info["r_cover"] > 0
+    for dim in range(2):
+        assert bottleneck_distance(full[dim], subsampled[dim]) <= 2 * info["r_cover"] + 1e-9
+
+    # A Rips threshold only turns deaths beyond it into infinite ones.
+    thresh = np.quantile(distance, 0.1)
+    thresholded = compute_persistence(distance, thresh=thresh)
+    full_deaths = np.sort(full[0][:, 1])
+    kept = thresholded[0][np.isfinite(thresholded[0][:, 1]), 1]
+    assert np.allclose(np.sort(kept), full_deaths[full_deaths <= thresh])
+
+
+@pytest.mark.parametrize("max_rows", [None, 5])
+def test_incremental_window_matches_full_recompute(max_rows):
+    store = IncrementalKernelStore(max_rows=64)
+    rows = np.random.default_rng(2).uniform(0, np.pi, size=(11, 2))
+    for batch in (rows[:2], rows[2:3], rows[3:7], rows[7:]):
+        snapshot = store.append("window", batch, gamma=0.5, max_rows=max_rows, include_matrices=True)
+    window = rows if max_rows is None else rows[-max_rows:]
+    matrices = snapshot["matrices"]
+    assert snapshot["window_size"] == len(window) and snapshot["total_appended"] == len(rows)
+    assert np.array_equal(matrices["input_data"], window)
+
+    quantum = compute_quantum_kernel_matrix(window)
+    classical = rbf_kernel(window, gamma=0.5)
+    assert np.allclose(matrices["quantum_kernel_matrix"], quantum, atol=1e-10)
+    assert np.allclose(matrices["classical_kernel_matrix"], classical, atol=1e-12)
+    assert np.allclose(matrices["quantum_distance_matrix"], kernel_to_distance(quantum), atol=1e-6)
+    assert np.allclose(matrices["classical_distance_matrix"], kernel_to_distance(classical), atol=1e-6)
+
+
+def test_incremental_store_rejects_an_empty_first_append():
+    store = IncrementalKernelStore()
+    for rows in ([], [[]]):
+        with pytest.raises(ValueError):
+            store.append("empty", rows)
+
+
+def _random_diagram(rng, size):
+    births = rng.uniform(0, 1, size)
+    return np.column_stack((births, births + rng.uniform(0, 1, size)))
+
+
+def test_diagram_distances_match_persim():
+    rng = np.random.default_rng(3)
+    for size1, size2 in [(8, 6), (1, 12), (0, 5), (20, 20)]:
+        d1, d2 = _random_diagram(rng, size1), _random_diagram(rng, size2)
+        assert bottleneck_distance(d1, d2) == pytest.approx(persim.bottleneck(d1, d2), abs=1e-12)
+        assert sliced_wasserstein_distance(d1, d2, num_directions=50) == \
+            pytest.approx(persim.sliced_wasserstein(d1, d2, M=50), rel=1e-6, abs=1e-9)
+    # Essential features are left out.
+    d1 = _random_diagram(rng, 5)
+    assert bottleneck_distance(np.vstack((d1, [[0.0, np.inf]])), d1) == 0.0
+
+
+def test_summaries_of_a_known_diagram():
+    h0 = np.array([[0.0, 0.5], [0.0, 1.0], [0.0, np.inf]])
+    h1 = np.array([[0.2, 0.6]])
+    summaries = summarize_diagrams([h0, h1], resolution=11, num_landscapes=2, image_resolution=8)
+    grid = summaries["grid"]
+    assert np.allclose(grid, np.linspace(0, 1, 11))
+    h0_summary, h1_summary = summaries["dimensions"]
+
+    assert h0_summary["betti_curve"].tolist() == [3] * 5 + [2] * 5 + [1]
+    assert h1_summary["betti_curve"].tolist() == [0, 0, 1, 1, 1, 1, 0, 0, 0, 0, 0]
+    # The first landscape of (0.2, 0.6) is a tent peaking at 0.2 at t = 0.4; the second is empty.
+    assert np.allclose(h1_summary["landscapes"][0], np.maximum(0, np.minimum(grid - 0.2, 0.6 - grid)))
+    assert np.allclose(h1_summary["landscapes"][1], 0)
+    assert h1_summary["persistence_image"].shape == (8, 8) and h1_summary["persistence_image"].min() >= 0
+    assert h0_summary["entropy"] == pytest.approx(persistent_entropy(h0[:2]))
+    assert persistent_entropy(np.array([[0, 1], [1, 2], [2, 3]])) == pytest.approx(np.log(3))
+
+
+def test_summaries_share_a_grid_over_a_common_range():
+    rng = np.random.default_rng(4)
+    small, large = [_random_diagram(rng, 5)], [2 * _random_diagram(rng, 5)]
+    value_range = diagram_range(small, large)
+    assert value_range == (0.0, float(large[0].max()))
+    grids = [summarize_diagrams(d, resolution=20, value_range=value_range)["grid"] for d in (small, large)]
+    assert np.array_equal(grids[0], grids[1])
+    with pytest.raises(ValueError):
+        summarize_diagrams(small, value_range=(1.0, 1.0))
+
+
+def test_pca_reduction_keeps_low_rank_data_intact():
+    rng = np.random.default_rng(5)
+    data = rng.normal(size=(200, 3)) @ rng.normal(size=(3, 20)) + rng.normal(size=20)
+    reduced, report = reduce_to_qubit_budget(data, max_qubits=4, method="pca")
+    assert reduced.shape == (200, 4)
+    assert report["method"] == "pca" and report["input_features"] == 20 and report["output_features"] == 4
+    assert report["total_explained_variance"] == pytest.approx(1.0)
+    # Data of rank 3 is projected without changing any pairwise distance.
+    assert np.allclose(euclidean_distances(reduced), euclidean_distances(data), atol=1e-8)
+
+
+def test_variance_selection_and_the_qubit_budget():
+    data = np.random.default_rng(6).normal(size=(50, 6)) * np.array([1, 5, 2, 4, 0.1, 3])
+    reduced, report = reduce_to_qubit_budget(data, max_qubits=3, method="variance")
+    assert report["selected_features"] == [1, 3, 5]
+    assert np.array_equal(reduced, data[:, [1, 3, 5]])
+
+    unchanged, report = reduce_to_qubit_budget(data, max_qubits=6, method="pca")
+    assert unchanged is data and report["method"] == "none"
+    with pytest.raises(ValueError):
+        reduce_to_qubit_budget(data, max_qubits=3, method="none")
+    with pytest.raises(ValueError):
+        reduce_to_qubit_budget(data, max_qubits=3, method="svd")